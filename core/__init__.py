@@ -1 +1,6 @@
-from .app import App
\ No newline at end of file
+def __getattr__(name):
+    # The app is imported lazily, so the solver can be used without Tk
+    if name == "App":
+        from .app import App
+        return App
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
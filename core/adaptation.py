@@ -0,0 +1,60 @@
+from numpy import array as npArray, bincount, maximum, minimum
+
+from .settings import ADAPTATION_RATE, ADAPTATION_MIN_PROBABILITY
+
+"""
+Adaptive operator selection: an operator that picks one of several methods (arms) for every
+candidate, like the random crossover or the number of swaps of the multi swap mutation, draws the
+arms from probabilities that follow the fitness improvements the arms bring.
+"""
+
+class ProbabilityMatching:
+    """ Probability matching: every arm has a quality, the moving average of its share of the fitness
+    improvements, and is drawn with a probability proportional to its quality. Every arm keeps at least
+    the probability "minProbability" so an arm that is bad at the beginning can come back later, or its
+    initial probability if it is lower, so a rare arm is not made more frequent by the floor alone. """
+    def __init__(self, weights, rate=ADAPTATION_RATE, minProbability=ADAPTATION_MIN_PROBABILITY):
+        """
+        Parameters:
+            - weights (list): Initial weight of every arm, they are the probabilities until the first credit
+            - rate (float) (optional=ADAPTATION_RATE): Weight of the last credit in the qualities,
+                0 keeps the initial weights
+            - minProbability (float) (optional=ADAPTATION_MIN_PROBABILITY): Lowest probability of an arm,
+                capped by its initial probability
+        """
+        weights = npArray(weights, dtype=float)
+        self.qualities = weights / weights.sum()
+        self.probabilities = self.qualities.copy()
+        self.rate = rate
+        # Lowest probability of every arm
+        self.floors = minimum(min(minProbability, 1 / len(weights)), self.probabilities)
+
+    def __len__(self):
+        return len(self.qualities)
+
+    def choose(self, rng, size=None):
+        """ Returns random arms drawn from the probabilities, a single one if size is None. """
+        return rng.choice(len(self), size=size, p=self.probabilities)
+
+    def credit(self, arms, improvements):
+        """
+        Updates the qualities and the probabilities from the fitness improvements of the candidates
+        made by some arms, a candidate worse than its parents counts as no improvement.
+
+        Parameters:
+            - arms (array): Arm of every candidate
+            - improvements (array): Fitness of every candidate minus the fitness of its parents
+        """
+        if self.rate == 0 or len(arms) == 0:
+            return
+        counts = bincount(arms, minlength=len(self))
+        totals = bincount(arms, weights=maximum(improvements, 0), minlength=len(self))
+        used = counts > 0
+        means = totals[used] / counts[used]
+        # Nothing improved, there is nothing to learn
+        if means.sum() == 0:
+            return
+
+        # The mean improvements are normalized into shares so the credit doesn't depend on the fitness scale
+        self.qualities[used] += self.rate * (means / means.sum() - self.qualities[used])
+        self.probabilities = self.floors + (1 - self.floors.sum()) * self.qualities / self.qualities.sum()
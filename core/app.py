@@ -2,11 +2,14 @@ from os import makedirs, path as osPath
 from numpy import loadtxt, savetxt
 import threading
 
-from .given import given
+from .given import Given
+from .context import Context
 from .sudoku import Sudoku
-from .settings import DIGIT_NUMBER, OpenButtonOption, RenderOption, SolveButtonOption, WriteButtonOption
+from .settings import DIGIT_SYMBOLS, OpenButtonOption, RenderOption, SolveButtonOption, WriteButtonOption, RENDER_RATE
 from .helper import decodePuzzle, encodePuzzle
 from .ui import Ui
+from .render import LatestQueue
+from .batch import readPuzzles
 
 class App:
     def __init__(self):
@@ -23,8 +26,10 @@ class App:
         self.skipReload = False
         # Store value when click to manual solve or write new puzzle
         self.currentRowColumn = None
+        # Given grid of the app, shared with the ui and the sudoku algorithm
+        self.given = Given()
         # The UI of app
-        self.ui = Ui()
+        self.ui = Ui(self.given)
         # List of command will pass to ui button
         self.ui.openCmd = self.open
         self.ui.writeCmd = self.write
@@ -33,20 +38,23 @@ class App:
         self.ui.clickCmd = self.click
         self.ui.pressCmd = self.press
         self.ui.loadCommamd() # load the command to button
+        # Latest render request of the solver, the UI thread draws it at RENDER_RATE
+        self.renderQueue = LatestQueue()
+        self.ui.window.after(1000 // RENDER_RATE, self.poll)
 
     def load(self, path):
         """
-        Load a puzzle to solve.
+        Load a puzzle to solve, the board takes the size of the puzzle.
         """
-        with open(path, "r") as f:
-            values = loadtxt(f).reshape((DIGIT_NUMBER, DIGIT_NUMBER)).astype(int)
-            given.loadValues(values)
-            # Initialize sudoku algorithm
-            self.sudoku = Sudoku(self.render)
-            # Manual create new thread to solve
-            self.solveThread = threading.Thread(target=self.sudoku.solve, daemon=True)
-            # Draw to UI the puzzle
-            self.ui.drawGivenBoard()
+        _, values = readPuzzles(path)[0]
+        self.given.loadValues(values)
+        # Initialize sudoku algorithm, the progress is drawn by the UI and not printed
+        self.sudoku = Sudoku(self.render, verbose=False, context=Context(self.given))
+        # Manual create new thread to solve
+        self.solveThread = threading.Thread(target=self.sudoku.solve, daemon=True)
+        # Draw to UI the puzzle
+        self.ui.resizeBoard(len(values))
+        self.ui.drawGivenBoard()
 
     def save(self, path, solution):
         """
@@ -56,20 +64,37 @@ class App:
         # Create new folder if not exist
         makedirs(dirPath, exist_ok=True)
         with open(path, "w") as f:
-            savetxt(f, solution.reshape(DIGIT_NUMBER, DIGIT_NUMBER), fmt='%d')
+            savetxt(f, solution.reshape(self.given.values.shape), fmt='%d')
 
     def render(self, text, option=RenderOption.NORMAL):
         """
         Render the current best solution to UI, use for the algorithm.
+        It only publishes a snapshot that the UI thread draws later, so the algorithm never waits for the UI
+        and the snapshots published between two refreshes are dropped.
+        """
+        self.renderQueue.put((text, option, self.given.bestCandidate.gene))
+
+    def poll(self):
+        """
+        Draw the latest snapshot published by render, it runs in the UI thread at RENDER_RATE.
+        """
+        snapshot = self.renderQueue.get()
+        if snapshot is not None:
+            self.draw(*snapshot)
+        self.ui.window.after(1000 // RENDER_RATE, self.poll)
+
+    def draw(self, text, option, gene):
+        """
+        Draw a snapshot of the algorithm to UI.
         """
         self.ui.showStatistic(text)
         # Decode the current puzzle from best candidate of algorithm
-        currentValues = decodePuzzle(given.bestCandidate.gene)
+        currentValues = decodePuzzle(gene)
         if option != RenderOption.ONLY_TEXT:
             # Update statistics and sudoku board values
             self.ui.showStatistic(text)
             self.ui.drawRemainBoard(currentValues)
-            win = given.updateDuplicateValues()
+            win = self.given.updateDuplicateValues(gene)
             # Draw win background if solution is found else draw the duplicate values
             if win:
                 self.ui.drawSolutionBg()
@@ -88,7 +113,6 @@ class App:
         if option == RenderOption.FOUNDED:
             # Save the solution to file
             self.save("solutions/" + self.puzzle, currentValues)
-        self.ui.window.update()
 
     def solve(self):
         """
@@ -105,9 +129,9 @@ class App:
         if not self.skipReload:
             try:
                 with open("solutions/" + self.puzzle, "r") as f:
-                    values = loadtxt(f).reshape((DIGIT_NUMBER, DIGIT_NUMBER)).astype(int)
-                    given.bestCandidate.gene = encodePuzzle(values)
-                    win = given.updateDuplicateValues()
+                    values = loadtxt(f).reshape(self.given.values.shape).astype(int)
+                    self.given.bestCandidate.gene = encodePuzzle(values)
+                    win = self.given.updateDuplicateValues()
                     if win:
                         self.render("Solution Reloaded", option=RenderOption.RELOADED)
                         return
@@ -141,9 +165,9 @@ class App:
         """
         # Clear the puzzle board and renew statistic as open recently
         self.ui.showStatistic("")
-        self.ui.drawRemainBoard(given.values)
-        given.resetBestCandidate(True)
-        given.updateDuplicateValues()
+        self.ui.drawRemainBoard(self.given.values)
+        self.given.resetBestCandidate(True)
+        self.given.updateDuplicateValues()
         self.ui.drawDuplicateBg()
         # Reset skipReload flag
         if self.skipReload:
@@ -170,12 +194,13 @@ class App:
             self.opening = True
         else:
             # Close puzzle and reset all to initial state
-            given.resetBestCandidate()
-            given.updateDuplicateValues()
-            given.loadValues(given.zeroCandidate.gene)
+            self.given.resetBestCandidate()
+            self.given.updateDuplicateValues()
+            self.given.loadValues(self.given.zeroCandidate.gene)
+            self.ui.resizeBoard(len(self.given.values))
             self.sudoku = None
             self.solveThread = None
-            self.ui.drawRemainBoard(given.values)
+            self.ui.drawRemainBoard(self.given.values)
             self.clear()
             self.ui.openButtonSwitch(OpenButtonOption.CLOSE)
             # Rename the app to initial
@@ -194,14 +219,14 @@ class App:
         # else save the current puzzle to file
         if not self.writing:
             self.ui.writeButtonSwitch(WriteButtonOption.WRITE)
-            given.resetBestCandidate(True)
+            self.given.resetBestCandidate(True)
             self.writing = True
         else:
             # Open dialog to get path to save puzzle
             try:
-                currentValues = decodePuzzle(given.bestCandidate.gene)
+                currentValues = decodePuzzle(self.given.bestCandidate.gene)
                 saveFile = self.ui.savePuzzleDialog()
-                savetxt(saveFile, currentValues.reshape(DIGIT_NUMBER, DIGIT_NUMBER), fmt='%d')
+                savetxt(saveFile, currentValues.reshape(self.given.values.shape), fmt='%d')
                 saveFile.close()
             except:
                 # cancel save action file has not been saved
@@ -223,18 +248,15 @@ class App:
         if self.keyWaiting:
             self.keyWaiting = False
             row, col, value = self.currentRowColumn
-            valueStr = ""
-            if value != 0:
-                valueStr = str(value)
-            self.ui.drawItem(row,col,valueStr)
+            self.ui.drawItem(row,col,int(value))
             return
         else:
             if self.opening or self.writing:
                 row, col = self.ui.clickToLogicalPosition(event.x, event.y)
-                if given.values[row][col] != 0:
+                if self.given.values[row][col] != 0:
                     return
                 self.ui.drawItem(row,col,"X")
-                currentValues = decodePuzzle(given.bestCandidate.gene)
+                currentValues = decodePuzzle(self.given.bestCandidate.gene)
                 self.currentRowColumn = (row, col, currentValues[row][col])
             else:
                 return
@@ -248,16 +270,17 @@ class App:
         if not self.keyWaiting:
             return
         row, col, value = self.currentRowColumn
-        currentValues = decodePuzzle(given.bestCandidate.gene)
-        # Set value to key pressed when it is in [1-9] else clear it and set value to 0
-        if event.char in list(map(chr,range(ord("1"),ord("9")+1))):
-            currentValues[row,col] = int(event.char)
+        currentValues = decodePuzzle(self.given.bestCandidate.gene)
+        # Set value to key pressed when it is a digit of the puzzle (letters above 9) else clear it and set value to 0
+        symbol = event.char.upper()
+        if symbol and symbol in DIGIT_SYMBOLS[1:len(currentValues) + 1]:
+            currentValues[row,col] = DIGIT_SYMBOLS.index(symbol)
         else:
             currentValues[row,col] = 0
-        given.bestCandidate.gene = encodePuzzle(currentValues)
+        self.given.bestCandidate.gene = encodePuzzle(currentValues)
         # Draw the updated puzzle
         self.ui.drawRemainBoard(currentValues)
-        win = given.updateDuplicateValues()
+        win = self.given.updateDuplicateValues()
         if win:
             self.ui.drawSolutionBg()
         else:
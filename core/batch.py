@@ -0,0 +1,237 @@
+import cProfile
+import json
+import random
+import sys
+from argparse import ArgumentParser
+from glob import glob
+from math import isqrt
+from multiprocessing import Pool
+from os import cpu_count, path as osPath
+from time import perf_counter
+from numpy import array as npArray
+
+from .given import Given
+from .context import loadConfig, newContext
+from .sudoku import Sudoku
+from .settings import DIGIT_NUMBER, DIGIT_SYMBOLS, EventOption, SolverOption, SOLVER_CHOICE
+from .helper import decodePuzzle
+from .island import solveIslands
+from .portfolio import solvePortfolio
+
+# Names of the solvers of the command line
+SOLVERS = {
+    "genetic": SolverOption.GENETIC,
+    "exact": SolverOption.EXACT,
+    "fallback": SolverOption.FALLBACK,
+    "annealing": SolverOption.ANNEALING,
+    "tabu": SolverOption.TABU,
+}
+
+def isDigitNumber(digitNumber):
+    """
+    Returns True if a grid can have "digitNumber" digits, its blocks are squares of at least 2 x 2 cells.
+    """
+    return digitNumber >= 4 and isqrt(digitNumber) ** 2 == digitNumber and digitNumber < len(DIGIT_SYMBOLS)
+
+def readPuzzles(path):
+    """
+    Returns the list of (name, values) of all puzzles in a file.
+
+    A file either holds one puzzle per line written as a string of 81 digits ("0" or "."
+    for an unknown digit), or puzzles written as 9 x 9 digits separated by spaces and end
+    line like the files of "puzzles" folder, several of them can follow each other.
+
+    The grid size is read from the puzzles: a string of 256 or 625 symbols is a 16 x 16 or 25 x 25
+    puzzle whose digits above 9 are letters (see DIGIT_SYMBOLS), and the first line of digits separated
+    by spaces holds as many digits as the grid.
+
+    Parameters:
+        - path (str): Path of the puzzle file
+    """
+    with open(path, "r") as f:
+        text = f.read()
+
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if lines and all(" " not in line and len(line) == len(lines[0]) for line in lines) \
+            and isDigitNumber(isqrt(len(lines[0]))) and isqrt(len(lines[0])) ** 2 == len(lines[0]):
+        digitNumber = isqrt(len(lines[0]))
+        symbols = {symbol: value for value, symbol in enumerate(DIGIT_SYMBOLS[:digitNumber + 1])}
+        symbols["."] = 0
+        try:
+            grids = [[symbols[c.upper()] for c in line] for line in lines]
+        except KeyError as error:
+            raise ValueError("%s contains the invalid symbol %s" % (path, error))
+    else:
+        numbers = [int(float(n)) for n in text.split()]
+        digitNumber = len(lines[0].split()) if lines else DIGIT_NUMBER
+        # A file without end lines holds 9 x 9 puzzles
+        if not isDigitNumber(digitNumber) or len(numbers) % (digitNumber * digitNumber) != 0:
+            digitNumber = DIGIT_NUMBER
+        cellNumber = digitNumber * digitNumber
+        if len(numbers) == 0 or len(numbers) % cellNumber != 0:
+            raise ValueError("%s does not contain %d x %d puzzles" % (path, digitNumber, digitNumber))
+        grids = [numbers[k:k + cellNumber] for k in range(0, len(numbers), cellNumber)]
+
+    name = osPath.basename(path)
+    if len(grids) == 1:
+        return [(name, npArray(grids[0]).reshape((digitNumber, digitNumber)))]
+
+    return [("%s:%d" % (name, k + 1), npArray(grid).reshape((digitNumber, digitNumber)))
+        for k, grid in enumerate(grids)]
+
+def collectPuzzles(sources):
+    """
+    Returns the list of (name, values) of all puzzles found from a list of sources.
+
+    Parameters:
+        - sources (list): Directories (all their .txt files are read), puzzle files or glob patterns
+    """
+    puzzles = []
+    for source in sources:
+        if osPath.isdir(source):
+            paths = sorted(glob(osPath.join(source, "*.txt")))
+        elif osPath.isfile(source):
+            paths = [source]
+        else:
+            paths = sorted(glob(source))
+        if len(paths) == 0:
+            print("No puzzle found for %s" % source, file=sys.stderr)
+        for path in paths:
+            puzzles.extend(readPuzzles(path))
+
+    return puzzles
+
+def solvePuzzle(job):
+    """
+    Solves a puzzle without UI and returns the result as a dictionary.
+
+    Parameters:
+        - job (tuple): Name, values, seed, number of islands, number of portfolio racers, solver (see
+            SolverOption) and configuration (see newContext, None for the settings) of the puzzle to solve,
+            islands and racers only run the genetic algorithm
+    """
+    name, values, seed, islandNumber, racerNumber, solver, config = job
+    start = perf_counter()
+    if racerNumber > 1:
+        result = solvePortfolio(values, racerNumber, seed, config=config)
+        result.pop("fitness")
+    elif islandNumber > 1:
+        result = solveIslands(values, islandNumber, seed, config)
+        result.pop("fitness")
+    else:
+        given = Given()
+        given.loadValues(values)
+        sudoku = Sudoku(verbose=False, seed=seed, solver=solver, context=newContext(config, given))
+        # Only the last event matters, it holds the best gene
+        for event in sudoku.iterate(snapshotInterval=0):
+            pass
+        solved = event.option == EventOption.FOUND
+        result = {
+            "solved": solved,
+            "solution": decodePuzzle(event.gene).tolist() if solved else None,
+            "generations": sudoku.generationCount,
+            "restarts": sudoku.reinitializationCount,
+            "seed": seed,
+            # Number of values removed by each propagation rule before the genetic algorithm
+            "propagation": sudoku.propagation,
+            # Seconds spent in each phase of the generation loop
+            "phases": {phase: round(stats["total"], 4) for phase, stats in sudoku.getStats()["phases"].items()},
+        }
+        # The exact search also tells whether the solution is unique, 2 stands for several solutions
+        if solver in (SolverOption.EXACT, SolverOption.FALLBACK):
+            result["solutions"] = sudoku.countSolutions()
+    elapsed = perf_counter() - start
+
+    return dict(puzzle=name, time=round(elapsed, 4), **result)
+
+def runBatch(puzzles, output, workers=1, seed=None, islandNumber=1, racerNumber=1, solver=SOLVER_CHOICE, config=None):
+    """
+    Solves a list of puzzles and writes one JSON line per puzzle as soon as it is solved.
+
+    Parameters:
+        - puzzles (list): (name, values) of the puzzles to solve
+        - output (file): File to write results to
+        - workers (int) (optional=1): Number of processes solving puzzles in parallel
+        - seed (int) (optional=None): Seed of the first puzzle, the next puzzles use the following seeds.
+            A random one is chosen if it's not given. A puzzle solved again with its seed gives the same result.
+        - islandNumber (int) (optional=1): Number of islands solving each puzzle with an island model,
+            puzzles are then solved one after another since every island has its own process.
+        - racerNumber (int) (optional=1): Number of differently configured solvers racing on each puzzle,
+            puzzles are then solved one after another since every racer has its own process.
+        - solver (int) (optional=SOLVER_CHOICE): Solver of the puzzles, see SolverOption
+        - config (dict) (optional=None): Operators and parameters of the genetic algorithm, e.g. a tuned
+            profile (see tuning module), the settings if it's not given
+
+    Return:
+        Number of solved puzzles
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**31)
+    jobs = [(name, values, seed + k, islandNumber, racerNumber, solver, config)
+        for k, (name, values) in enumerate(puzzles)]
+
+    solvedCount = 0
+    # Islands and racers already have their own processes
+    pool = Pool(workers) if workers > 1 and max(islandNumber, racerNumber) == 1 else None
+    try:
+        results = pool.imap_unordered(solvePuzzle, jobs) if pool else map(solvePuzzle, jobs)
+        for result in results:
+            solvedCount += result["solved"]
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if pool:
+            pool.terminate()
+
+    return solvedCount
+
+def main(argv):
+    parser = ArgumentParser(description="Solve Sudoku puzzles without UI and write one JSON line per puzzle.")
+    parser.add_argument("sources", nargs="+",
+        help="puzzle directories, puzzle files or glob patterns")
+    parser.add_argument("-o", "--output", default="-",
+        help="file to write results to, stdout by default")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+        help="number of puzzles solved in parallel, 0 uses every core")
+    parser.add_argument("-s", "--seed", type=int, default=None,
+        help="seed of the first puzzle, random by default")
+    parser.add_argument("-i", "--islands", type=int, default=1,
+        help="solve each puzzle with an island model of this many processes")
+    parser.add_argument("-p", "--portfolio", type=int, default=1,
+        help="race this many differently configured solvers on each puzzle, the winning configuration is recorded")
+    parser.add_argument("--solver", choices=SOLVERS, default=None,
+        help="genetic algorithm, exact search, exact search after the genetic algorithm failed, simulated "
+            "annealing or tabu search, the SOLVER_CHOICE setting by default")
+    parser.add_argument("-c", "--config", default=None,
+        help="profile file of the operators and parameters of the genetic algorithm, see tune.py, "
+            "the settings by default")
+    parser.add_argument("--profile", default=None,
+        help="run under cProfile and write the pstats to this file, puzzles are then solved in this process")
+    args = parser.parse_args(argv)
+
+    puzzles = collectPuzzles(args.sources)
+    workers = args.workers if args.workers > 0 else cpu_count()
+    solver = SOLVERS[args.solver] if args.solver else SOLVER_CHOICE
+    config = loadConfig(args.config) if args.config else None
+    # Only the work done in this process can be profiled
+    if args.profile:
+        workers = 1
+    profile = cProfile.Profile() if args.profile else None
+    start = perf_counter()
+    if profile:
+        profile.enable()
+    try:
+        if args.output == "-":
+            solvedCount = runBatch(puzzles, sys.stdout, workers, args.seed, args.islands, args.portfolio, solver,
+                config)
+        else:
+            with open(args.output, "w") as output:
+                solvedCount = runBatch(puzzles, output, workers, args.seed, args.islands, args.portfolio, solver,
+                    config)
+    finally:
+        if profile:
+            profile.disable()
+            profile.dump_stats(args.profile)
+    print("Solved %d/%d puzzles in %.2fs" % (solvedCount, len(puzzles), perf_counter() - start), file=sys.stderr)
+
+    return 0 if solvedCount == len(puzzles) else 1
@@ -0,0 +1,157 @@
+import json
+import sys
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from os import cpu_count
+from time import perf_counter
+from numpy import median, percentile
+
+from .batch import SOLVERS, collectPuzzles, solvePuzzle
+from .context import loadConfig
+from .settings import SOLVER_CHOICE
+
+# Metrics of a puzzle compared against a baseline, with True when a higher value is better
+METRICS = {
+    "successRate": True,
+    "medianTime": False,
+    "p90Time": False,
+    "medianGenerations": False,
+    "meanRestarts": False,
+    "generationsPerSecond": True,
+}
+
+def summarize(results):
+    """
+    Returns the statistics of several runs of a puzzle.
+    The time and generations to solution are only taken from the runs that found a solution.
+
+    Parameters:
+        - results (list): Result dictionaries of the runs, see batch.solvePuzzle
+    """
+    solved = [result for result in results if result["solved"]]
+    times = [result["time"] for result in solved]
+    generations = [result["generations"] for result in solved]
+    totalTime = sum(result["time"] for result in results)
+
+    return {
+        "runs": len(results),
+        "solved": len(solved),
+        "successRate": round(len(solved) / len(results), 4),
+        "medianTime": round(float(median(times)), 4) if solved else None,
+        "p90Time": round(float(percentile(times, 90)), 4) if solved else None,
+        "medianGenerations": float(median(generations)) if solved else None,
+        "meanRestarts": round(sum(result["restarts"] for result in results) / len(results), 4),
+        "generationsPerSecond": round(sum(result["generations"] for result in results) / totalTime, 2)
+            if totalTime > 0 else None,
+    }
+
+def runBenchmark(puzzles, runs=5, seed=0, workers=1, solver=SOLVER_CHOICE, config=None):
+    """
+    Solves every puzzle with several seeds and returns the statistics of each puzzle.
+
+    Parameters:
+        - puzzles (list): (name, values) of the puzzles to solve
+        - runs (int) (optional=5): Number of runs of each puzzle
+        - seed (int) (optional=0): Seed of the first run, the next runs use the following seeds.
+            Every puzzle is solved with the same seeds so two benchmarks can be compared.
+        - workers (int) (optional=1): Number of processes solving puzzles in parallel, the
+            time of every run is then measured while the other workers are busy
+        - solver (int) (optional=SOLVER_CHOICE): Solver of the puzzles, see SolverOption
+        - config (dict) (optional=None): Operators and parameters of the genetic algorithm, see newContext
+
+    Return:
+        Dictionary of the benchmark settings and of the statistics of each puzzle
+    """
+    jobs = [(name, values, seed + k, 1, 1, solver, config) for name, values in puzzles for k in range(runs)]
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        results = pool.map(solvePuzzle, jobs) if pool else list(map(solvePuzzle, jobs))
+    finally:
+        if pool:
+            pool.terminate()
+
+    stats = {}
+    for name, _ in puzzles:
+        stats[name] = summarize([result for result in results if result["puzzle"] == name])
+
+    return {"runs": runs, "seed": seed, "workers": workers, "solver": solver, "config": config, "puzzles": stats}
+
+def compareBenchmarks(current, baseline, tolerance=0.1):
+    """
+    Returns the regressions of a benchmark against a baseline benchmark.
+
+    Parameters:
+        - current (dict): Benchmark to check, see runBenchmark
+        - baseline (dict): Saved benchmark to compare against
+        - tolerance (float) (optional=0.1): Relative change of a metric that is not reported
+
+    Return:
+        List of (puzzle, metric, baseline value, current value) of every metric that got worse
+    """
+    regressions = []
+    for name, stats in current["puzzles"].items():
+        baselineStats = baseline["puzzles"].get(name)
+        if baselineStats is None:
+            continue
+        for metric, higherIsBetter in METRICS.items():
+            value, baselineValue = stats.get(metric), baselineStats.get(metric)
+            if baselineValue is None:
+                continue
+            if value is None:
+                regressions.append((name, metric, baselineValue, value))
+            elif higherIsBetter and value < baselineValue * (1 - tolerance):
+                regressions.append((name, metric, baselineValue, value))
+            # Increases below a millisecond are timing noise
+            elif not higherIsBetter and value > baselineValue * (1 + tolerance) and value - baselineValue > 1e-3:
+                regressions.append((name, metric, baselineValue, value))
+
+    return regressions
+
+def main(argv):
+    parser = ArgumentParser(description="Benchmark the solver on a puzzle corpus and write the statistics as JSON.")
+    parser.add_argument("sources", nargs="*", default=["puzzles"],
+        help="puzzle directories, puzzle files or glob patterns, the puzzles folder by default")
+    parser.add_argument("-r", "--runs", type=int, default=5,
+        help="number of seeds each puzzle is solved with")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+        help="seed of the first run of every puzzle")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+        help="number of runs in parallel, 0 uses every core, timings are only comparable with the same value")
+    parser.add_argument("--solver", choices=SOLVERS, default=None,
+        help="solver to benchmark, the SOLVER_CHOICE setting by default")
+    parser.add_argument("--config", default=None,
+        help="profile file of the operators and parameters of the genetic algorithm, see tune.py, "
+            "the settings by default")
+    parser.add_argument("-o", "--output", default="-",
+        help="file to write the benchmark to, stdout by default")
+    parser.add_argument("-c", "--compare", default=None,
+        help="baseline benchmark file, regressions against it are reported and fail the run")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.1,
+        help="relative change of a metric that is not reported as a regression")
+    args = parser.parse_args(argv)
+
+    puzzles = collectPuzzles(args.sources)
+    workers = args.workers if args.workers > 0 else cpu_count()
+    start = perf_counter()
+    benchmark = runBenchmark(puzzles, args.runs, args.seed, workers,
+        SOLVERS[args.solver] if args.solver else SOLVER_CHOICE, loadConfig(args.config) if args.config else None)
+    text = json.dumps(benchmark, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    print("Benchmarked %d puzzles in %.2fs" % (len(puzzles), perf_counter() - start), file=sys.stderr)
+
+    if args.compare is None:
+        return 0
+
+    with open(args.compare, "r") as f:
+        baseline = json.load(f)
+    regressions = compareBenchmarks(benchmark, baseline, args.tolerance)
+    for name, metric, baselineValue, value in regressions:
+        print("Regression on %s: %s went from %s to %s" % (name, metric, baselineValue, value), file=sys.stderr)
+    if not regressions:
+        print("No regression against %s" % args.compare, file=sys.stderr)
+
+    return 1 if regressions else 0
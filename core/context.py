@@ -0,0 +1,102 @@
+import json
+
+from .given import Given
+from .fitness import Fitness
+from .mutation import Mutation
+from .selection import Selection
+from .crossover import Crossover
+from .settings import FITNESS_CHOICE, MUTATION_CHOICE, SELECTION_CHOICE, CROSSOVER_CHOICE
+from .settings import FitnessOption, MutationOption, SelectionOption, CrossoverOption
+from .settings import POPULATION_SIZE, ELITE_NUMBER, MUTATION_RATE, CROSSOVER_RATE, MAX_STALE_COUNT
+
+# Operator choices of a configuration, written with the names of the options in settings
+OPERATORS = {
+    "fitness": FitnessOption,
+    "mutation": MutationOption,
+    "selection": SelectionOption,
+    "crossover": CrossoverOption,
+}
+
+# Numeric parameters of a configuration with their type
+PARAMETERS = {
+    "populationSize": int,
+    "eliteNumber": int,
+    "mutationRate": float,
+    "crossoverRate": float,
+    "maxStaleCount": int,
+}
+
+class Context:
+    """
+    Everything a solver shares with its population and its owner: the given grid with the best
+    candidate, the genetic operators built from their options and the parameters of the genetic
+    algorithm. Every solver has its own context, so solvers with different puzzles, operators or
+    parameters can run side by side in one process.
+    """
+
+    def __init__(self, given=None, fitnessOption=FITNESS_CHOICE, mutationOption=MUTATION_CHOICE,
+            selectionOption=SELECTION_CHOICE, crossoverOption=CROSSOVER_CHOICE, populationSize=POPULATION_SIZE,
+            eliteNumber=ELITE_NUMBER, mutationRate=MUTATION_RATE, crossoverRate=CROSSOVER_RATE,
+            maxStaleCount=MAX_STALE_COUNT):
+        """
+        Parameters:
+            - given (Given) (optional=None): The given grid, an empty one if it's not given
+            - fitnessOption (int) (optional=FITNESS_CHOICE): Fitness function, see FitnessOption
+            - mutationOption (int) (optional=MUTATION_CHOICE): Mutation operator, see MutationOption
+            - selectionOption (int) (optional=SELECTION_CHOICE): Selection operator, see SelectionOption
+            - crossoverOption (int) (optional=CROSSOVER_CHOICE): Crossover operator, see CrossoverOption
+            - populationSize (int) (optional=POPULATION_SIZE): Number of candidates
+            - eliteNumber (int) (optional=ELITE_NUMBER): Number of elites kept by every generation
+            - mutationRate (float) (optional=MUTATION_RATE): Probability of a child to be mutated
+            - crossoverRate (float) (optional=CROSSOVER_RATE): Probability of a couple to be crossed over
+            - maxStaleCount (int) (optional=MAX_STALE_COUNT): Generations without progress before a restart
+        """
+        self.given = Given() if given is None else given
+        self.fitness = Fitness(fitnessOption)
+        self.mutation = Mutation(mutationOption)
+        self.selection = Selection(selectionOption)
+        self.crossover = Crossover(crossoverOption)
+        self.populationSize = populationSize
+        self.eliteNumber = eliteNumber
+        self.mutationRate = mutationRate
+        self.crossoverRate = crossoverRate
+        self.maxStaleCount = maxStaleCount
+
+def newContext(config=None, given=None):
+    """
+    Returns a solver context built from a configuration, the settings fill what it doesn't set.
+
+    Parameters:
+        - config (dict) (optional=None): Option names of the fitness, mutation, selection and crossover
+            to use (see OPERATORS) and values of the parameters of the genetic algorithm (see PARAMETERS)
+        - given (Given) (optional=None): The given grid of the context, an empty one if it's not given
+    """
+    config = {} if config is None else config
+    arguments = {}
+    for key, value in config.items():
+        if key in OPERATORS:
+            if not hasattr(OPERATORS[key], value):
+                raise ValueError("Unknown %s option %s" % (key, value))
+            arguments[key + "Option"] = getattr(OPERATORS[key], value)
+        elif key in PARAMETERS:
+            arguments[key] = PARAMETERS[key](value)
+        else:
+            raise ValueError("Unknown parameter %s" % key)
+
+    return Context(given, **arguments)
+
+def loadConfig(path):
+    """
+    Returns the configuration of a profile file, see newContext. A profile is a JSON object, either a
+    configuration or the output of the tuner whose "config" entry is the best configuration found.
+
+    Parameters:
+        - path (str): Path of the profile file
+    """
+    with open(path, "r") as f:
+        profile = json.load(f)
+    config = profile.get("config", profile)
+    # The configuration is checked before any solver uses it
+    newContext(config)
+
+    return config
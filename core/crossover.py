@@ -1,11 +1,23 @@
-from .candidate import Candidate
 from .settings import CROSSOVER_CHOICE, CrossoverOption
-import random
-from numpy import copy as npCopy, concatenate as npConcatenate
+from .adaptation import ProbabilityMatching
+from numpy import arange, concatenate as npConcatenate, empty, where
 
 class Crossover:
-    def __init__(self):
-        self.call = self.getChoice()
+    """ Crossover operators work on a whole set of couples at once. The parents are given as two
+    arrays of indexes in the population, the i-th couple is made of firstParents[i] and secondParents[i].
+    Every operator decides which sub-blocks each child takes from the other parent, so the children are
+    built in one shot from per-block boolean masks.
+
+    Every operator returns a (2N, DIGIT_NUMBER, DIGIT_NUMBER) array: the first children of the N
+    couples followed by their second children.
+
+    The operator of every couple of the random crossover is chosen by adaptive operator selection, see credit. """
+    def __init__(self, option=CROSSOVER_CHOICE):
+        self.call = self.getChoice(option)
+        # Weights of onePointCrossover, rowColCrossover, uniformCrossover and twoPointcrossover in randomCrossover
+        self.randomWeights = ProbabilityMatching([0.3, 0.4, 0.2, 0.1])
+        # Weights and arm of every couple of the last crossover, until they are credited
+        self.pending = None
 
     def getChoice(self, option=CROSSOVER_CHOICE):
         if option == CrossoverOption.RANDOM:
@@ -22,242 +34,208 @@ class Crossover:
             return self.choiceCrossover
         elif option == CrossoverOption.HALF:
             return self.halfCrossover
-    
-    def randomCrossover(self, parent1, parent2, crossoverRate):
-        randomMethods = [self.onePointCrossover, self.rowColCrossover,
-                self.uniformCrossover, self.twoPointcrossover]
-        randomWeights = [0.3, 0.4, 0.2, 0.1]
-        method = random.choices(randomMethods, weights=randomWeights, k=1)[0]
-        return method(parent1, parent2, crossoverRate)
 
-    def onePointCrossover(self, parent1, parent2, crossoverRate):
-        """ Create two new child candidates by crossing over parent genes.
-        Parent genes are splitted by one point and then concatenate to generate child genes
-        
+    def exchangeBlocks(self, genes, firstParents, secondParents, firstMasks, secondMasks, crossoverRate, rng):
+        """ Create the children of every couple from the sub-blocks they take from the other parent.
+
         Parameters:
-            - parent1 (Candidate): First parent to crossover
-            - parent2 (Candidate): Second parent to crossover
+            - genes (array): Genes of the population
+            - firstParents (array): Indexes of the first parent of each couple
+            - secondParents (array): Indexes of the second parent of each couple
+            - firstMasks (array): (N, DIGIT_NUMBER) sub-blocks the first child takes from the second parent
+            - secondMasks (array): (N, DIGIT_NUMBER) sub-blocks the second child takes from the first parent
             - crossoverRate (float): Ratio defines if these parents are crossover or not
-        
+            - rng (Generator): Random number generator
+
         Return:
-            Tuple of two child generate from the crossover process
+            Genes of the first children followed by the genes of the second children
+        """
+        # Couples that are not crossover give a copy of themselves
+        crossed = (rng.random(len(firstParents)) < crossoverRate).reshape(-1, 1)
+        firstMasks = (firstMasks & crossed).reshape(firstMasks.shape + (1,))
+        secondMasks = (secondMasks & crossed).reshape(secondMasks.shape + (1,))
+
+        grid1 = genes[firstParents]
+        grid2 = genes[secondParents]
+
+        return npConcatenate((where(firstMasks, grid2, grid1), where(secondMasks, grid1, grid2)))
+
+    def credit(self, couples, improvements):
+        """ Credits the arms of the couples of the last crossover with the fitness improvements of their
+        children, it does nothing if the operator has no adaptive choice.
+
+        Parameters:
+            - couples (array): Couple of every child
+            - improvements (array): Fitness of every child minus the fitness of its fitter parent
         """
+        if self.pending is not None:
+            weights, arms = self.pending
+            self.pending = None
+            weights.credit(arms[couples], improvements)
 
-        child1 = Candidate()
-        child2 = Candidate()
+    def randomCrossover(self, genes, fitnessMatrices, firstParents, secondParents, crossoverRate, rng):
+        randomMethods = [self.onePointCrossover, self.rowColCrossover,
+                self.uniformCrossover, self.twoPointcrossover]
+        coupleNumber = len(firstParents)
+        methods = self.randomWeights.choose(rng, coupleNumber)
+        self.pending = (self.randomWeights, methods)
+
+        # The children keep the order of their couples so they can be credited
+        children = empty((2 * coupleNumber,) + genes.shape[1:], dtype=genes.dtype)
+        for k, method in enumerate(randomMethods):
+            couples = (methods == k).nonzero()[0]
+            methodChildren = method(genes, fitnessMatrices, firstParents[couples], secondParents[couples],
+                crossoverRate, rng)
+            children[couples] = methodChildren[:len(couples)]
+            children[coupleNumber + couples] = methodChildren[len(couples):]
+
+        return children
+
+    def onePointCrossover(self, genes, fitnessMatrices, firstParents, secondParents, crossoverRate, rng):
+        """ Create two new child candidates by crossing over parent genes.
+        Parent genes are splitted by one point and then concatenate to generate child genes
 
-        # Make a copy of the parent genes.
-        grid1 = npCopy(parent1.gene)
-        grid2 = npCopy(parent2.gene)
+        Parameters:
+            - genes (array): Genes of the population
+            - fitnessMatrices (array): Fitness matrices of the population
+            - firstParents (array): Indexes of the first parent of each couple
+            - secondParents (array): Indexes of the second parent of each couple
+            - crossoverRate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator): Random number generator
 
-        gridSize = len(parent1.gene)
+        Return:
+            Genes of the first children followed by the genes of the second children
+        """
+        gridSize = genes.shape[1]
 
-        r = random.random()
-        if r < crossoverRate:
-            # Get a ranom crossover point to split parent genes
-            crossPoint = random.randint(1, gridSize - 2)
-            child1.gene = npConcatenate((grid1[:crossPoint], grid2[crossPoint:]), axis=0)
-            child2.gene = npConcatenate((grid2[:crossPoint], grid1[crossPoint:]), axis=0)
-        else:
-            child1.gene = grid1
-            child2.gene = grid2
+        # Get a ranom crossover point to split parent genes
+        crossPoints = rng.integers(1, gridSize - 1, len(firstParents)).reshape(-1, 1)
+        masks = arange(gridSize) >= crossPoints
 
-        return child1, child2
+        return self.exchangeBlocks(genes, firstParents, secondParents, masks, masks, crossoverRate, rng)
 
-    def twoPointcrossover(self, parent1, parent2, crossoverRate):
+    def twoPointcrossover(self, genes, fitnessMatrices, firstParents, secondParents, crossoverRate, rng):
         """ Create two new child candidates by crossing over parent genes.
-        Parent genes are splitted by two point and then concatenate to generate child genes 
-        
+        Parent genes are splitted by two point and then concatenate to generate child genes
+
         Parameters:
-            - parent1 (Candidate): First parent to crossover
-            - parent2 (Candidate): Second parent to crossover
+            - genes (array): Genes of the population
+            - fitnessMatrices (array): Fitness matrices of the population
+            - firstParents (array): Indexes of the first parent of each couple
+            - secondParents (array): Indexes of the second parent of each couple
             - crossoverRate (float): Ratio defines if these parents are crossover or not
-        
+            - rng (Generator): Random number generator
+
         Return:
-            Tuple of two child generate from the crossover process
+            Genes of the first children followed by the genes of the second children
         """
+        gridSize = genes.shape[1]
+
+        # Select two crossover point
+        crossPoints1 = rng.integers(1, gridSize - 1, len(firstParents))
+        crossPoints2 = rng.integers(crossPoints1 + 1, gridSize).reshape(-1, 1)
+        crossPoints1 = crossPoints1.reshape(-1, 1)
+        # Swap all sub-blocks between two crossover points to generate new child
+        blocks = arange(gridSize)
+        masks = (blocks >= crossPoints1) & (blocks < crossPoints2)
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
-        grid1 = npCopy(parent1.gene)
-        grid2 = npCopy(parent2.gene)
-
-        gridSize = len(parent1.gene)
-        r = random.random()
-        if r < crossoverRate:
-            # Select two crossover point
-            crossPoint1 = random.randint(1, gridSize - 2)
-            crossPoint2 = random.randint(crossPoint1 + 1, gridSize - 1)
-            # Swap all sub-blocks between two crossover points to generate new child
-            child1.gene = npConcatenate((grid1[:crossPoint1], grid2[crossPoint1:crossPoint2], grid1[crossPoint2:]), axis=0)
-            child2.gene = npConcatenate((grid2[:crossPoint1], grid1[crossPoint1:crossPoint2], grid2[crossPoint2:]), axis=0)
-        else:
-            child1.gene = grid1
-            child2.gene = grid2
-
-        return child1, child2
-
-    def rowColCrossover(self, parent1, parent2, crossoverRate):
+        return self.exchangeBlocks(genes, firstParents, secondParents, masks, masks, crossoverRate, rng)
+
+    def rowColCrossover(self, genes, fitnessMatrices, firstParents, secondParents, crossoverRate, rng):
         """ Create two new child candidates by crossing over parent genes.
-            When two child individuals are generated from two parents, scores are obtained 
-            for each of the three rows that constitute the sub-blocks of the parents, 
-            and a child inherits the ones with the highest scores. Then the columns are 
-            compared in the same way and the other child inherits the ones with the highest scores. 
-        
+            When two child individuals are generated from two parents, scores are obtained
+            for each of the three rows that constitute the sub-blocks of the parents,
+            and a child inherits the ones with the highest scores. Then the columns are
+            compared in the same way and the other child inherits the ones with the highest scores.
+
         Parameters:
-            - parent1 (Candidate): First parent to crossover
-            - parent2 (Candidate): Second parent to crossover
+            - genes (array): Genes of the population
+            - fitnessMatrices (array): Fitness matrices of the population
+            - firstParents (array): Indexes of the first parent of each couple
+            - secondParents (array): Indexes of the second parent of each couple
             - crossoverRate (float): Ratio defines if these parents are crossover or not
-        
+            - rng (Generator): Random number generator
+
         Return:
-            Tuple of two child generate from the crossover process
+            Genes of the first children followed by the genes of the second children
         """
+        blocks = arange(genes.shape[1])
+        blockNumber = fitnessMatrices.shape[-1]
+        rowScore1 = fitnessMatrices[firstParents, 0][:, blocks // blockNumber]
+        rowScore2 = fitnessMatrices[secondParents, 0][:, blocks // blockNumber]
+
+        colScore1 = fitnessMatrices[firstParents, 1][:, blocks % blockNumber]
+        colScore2 = fitnessMatrices[secondParents, 1][:, blocks % blockNumber]
+
+        # For each row of sub-block, the first child will inherit the row
+        # with the highest fitness score between two parents
+        firstMasks = ~(rowScore1 > rowScore2)
+        # For each col of sub-block, the second child will inherit the col
+        # with the highest fitness score between two parents
+        secondMasks = colScore1 > colScore2
+
+        return self.exchangeBlocks(genes, firstParents, secondParents, firstMasks, secondMasks, crossoverRate, rng)
+
+    def uniformCrossover(self, genes, fitnessMatrices, firstParents, secondParents, crossoverRate, rng):
+        """ Create two new child candidates by crossing over parent genes.
+        Parent genes will swap one random sub-block to generate child genes
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
-        grid1 = parent1.gene
-        grid2 = parent2.gene
-
-        r = random.random()
-        if r < crossoverRate:
-            rowScore1 = parent1.fitnessMatrix[0]
-            rowScore2 = parent2.fitnessMatrix[0]
-
-            colScore1 = parent1.fitnessMatrix[1]
-            colScore2 = parent2.fitnessMatrix[1]
-
-            for i in range(3):
-                # For each row of sub-block, the first child will inherit the row
-                # with the highest fitness score between two parents
-                if rowScore1[i] > rowScore2[i]:
-                    child1.gene[3*i:3*(i+1)] = npCopy(grid1[3*i:3*(i+1)])
-                else:
-                    child1.gene[3*i:3*(i+1)] = npCopy(grid2[3*i:3*(i+1)])
-                
-                # For each col of sub-block, the first child will inherit the col
-                # with the highest fitness score between two parents
-                if colScore1[i] > colScore2[i]:
-                    for j in range(3):
-                        child2.gene[j * 3 + i] = npCopy(grid1[j * 3 + i])
-                else:
-                    for j in range(3):
-                        child2.gene[j * 3 + i] = npCopy(grid2[j * 3 + i])
-        else:
-            child1.gene = npCopy(grid1)
-            child2.gene = npCopy(grid2)
-
-        return child1, child2
-
-    def uniformCrossover(self, parent1, parent2, crossoverRate):
-        """ Create two new child candidates by crossing over parent genes. 
-        Parent genes will swap 2 consecutive sub-blocks to generate child genes
-        
         Parameters:
-            - parent1 (Candidate): First parent to crossover
-            - parent2 (Candidate): Second parent to crossover
+            - genes (array): Genes of the population
+            - fitnessMatrices (array): Fitness matrices of the population
+            - firstParents (array): Indexes of the first parent of each couple
+            - secondParents (array): Indexes of the second parent of each couple
             - crossoverRate (float): Ratio defines if these parents are crossover or not
-        
+            - rng (Generator): Random number generator
+
         Return:
-            Tuple of two child generate from the crossover process
+            Genes of the first children followed by the genes of the second children
         """
+        gridSize = genes.shape[1]
+
+        # Select a sub-block and swap them between two parents
+        crossPoints = rng.integers(0, gridSize, len(firstParents)).reshape(-1, 1)
+        masks = arange(gridSize) == crossPoints
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
-        grid1 = npCopy(parent1.gene)
-        grid2 = npCopy(parent2.gene)
-
-        gridSize = len(parent1.gene)
-        r = random.random()
-        if r < crossoverRate:
-            # Select a sub-block and swap them between two parents
-            crossPoint = random.randint(0, gridSize - 1)
-            tmp = grid1[crossPoint]
-            grid1[crossPoint] = grid2[crossPoint]
-            grid2[crossPoint] = tmp
-            child1.gene = grid1
-            child2.gene = grid2
-        else:
-            child1.gene = grid1
-            child2.gene = grid2
-
-        return child1, child2
-
-    def choiceCrossover(self, parent1, parent2, crossoverRate):
+        return self.exchangeBlocks(genes, firstParents, secondParents, masks, masks, crossoverRate, rng)
+
+    def choiceCrossover(self, genes, fitnessMatrices, firstParents, secondParents, crossoverRate, rng):
         """ Create two new child candidates by crossing over parent genes.
-        The child will randomly choose each sub grid from first parent or second parent 
-        
+        The child will randomly choose each sub grid from first parent or second parent
+
         Parameters:
-            - parent1 (Candidate): First parent to crossover
-            - parent2 (Candidate): Second parent to crossover
+            - genes (array): Genes of the population
+            - fitnessMatrices (array): Fitness matrices of the population
+            - firstParents (array): Indexes of the first parent of each couple
+            - secondParents (array): Indexes of the second parent of each couple
             - crossoverRate (float): Ratio defines if these parents are crossover or not
-        
+            - rng (Generator): Random number generator
+
         Return:
-            Tuple of two child generate from the crossover process
+            Genes of the first children followed by the genes of the second children
         """
+        # Randomly select sub-block from two parents to generate new child
+        masks = rng.random((2, len(firstParents), genes.shape[1])) < 0.5
+
+        return self.exchangeBlocks(genes, firstParents, secondParents, masks[0], masks[1], crossoverRate, rng)
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
-        grid1 = parent1.gene
-        grid2 = parent2.gene
-
-        gridSize = len(parent1.gene)
-        r = random.random()
-        if r < crossoverRate:
-            for i in range(gridSize):
-                # Randomly select sub-block from two parents to generate new child
-                blocks = [grid1[i], grid2[i]]
-                child1.gene[i] = npCopy(random.choice(blocks))
-                child2.gene[i] = npCopy(random.choice(blocks))
-        else:
-            child1.gene = npCopy(grid1)
-            child2.gene = npCopy(grid2)
-
-        return child1, child2
-
-    def halfCrossover(self, parent1, parent2, crossoverRate):
-        """ Create two new child candidates by crossing over parent genes. 
+    def halfCrossover(self, genes, fitnessMatrices, firstParents, secondParents, crossoverRate, rng):
+        """ Create two new child candidates by crossing over parent genes.
         The first child will randomly choose each sub grid from first parent or second parent
         and the second child will get all unchoosen sub grid
-        
+
         Parameters:
-            - parent1 (Candidate): First parent to crossover
-            - parent2 (Candidate): Second parent to crossover
+            - genes (array): Genes of the population
+            - fitnessMatrices (array): Fitness matrices of the population
+            - firstParents (array): Indexes of the first parent of each couple
+            - secondParents (array): Indexes of the second parent of each couple
             - crossoverRate (float): Ratio defines if these parents are crossover or not
-        
+            - rng (Generator): Random number generator
+
         Return:
-            Tuple of two child generate from the crossover process
+            Genes of the first children followed by the genes of the second children
         """
+        # Randomly select sub-block from two parents to generate new child
+        masks = rng.random((len(firstParents), genes.shape[1])) >= 0.5
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
-        grid1 = parent1.gene
-        grid2 = parent2.gene
-
-        gridSize = len(parent1.gene)
-        r = random.random()
-        if r < crossoverRate:
-            for i in range(gridSize):
-                # Randomly select sub-block from two parents to generate new child
-                if random.random() < 0.5:
-                    child1.gene[i] = npCopy(grid1[i])
-                    child2.gene[i] = npCopy(grid2[i])
-                else:
-                    child1.gene[i] = npCopy(grid2[i])
-                    child2.gene[i] = npCopy(grid1[i])
-        else:
-            child1.gene = npCopy(grid1)
-            child2.gene = npCopy(grid2)
-
-        return child1, child2
-
-crossover = Crossover()
\ No newline at end of file
+        return self.exchangeBlocks(genes, firstParents, secondParents, masks, masks, crossoverRate, rng)
@@ -0,0 +1,27 @@
+class Event:
+    """
+    A progress report of the genetic algorithm, yielded by Sudoku.iterate.
+
+    Attributes:
+        - option (int): Kind of the event, see EventOption
+        - generation (int): Index of the current generation
+        - bestFitness (int): Fitness of the best candidate
+        - worstFitness (int): Fitness of the worst candidate
+        - restarts (int): Number of reinitializations of the population so far
+        - elapsed (float): Seconds since the solve started
+        - gene (array): Copy of the best chromosome, None if no snapshot was taken
+    """
+    __slots__ = ("option", "generation", "bestFitness", "worstFitness", "restarts", "elapsed", "gene")
+
+    def __init__(self, option, generation=0, bestFitness=0, worstFitness=0, restarts=0, elapsed=0.0, gene=None):
+        self.option = option
+        self.generation = generation
+        self.bestFitness = bestFitness
+        self.worstFitness = worstFitness
+        self.restarts = restarts
+        self.elapsed = elapsed
+        self.gene = gene
+
+    def __repr__(self):
+        return "Event(option=%d, generation=%d, bestFitness=%d, worstFitness=%d, restarts=%d, elapsed=%.3f)" % (
+            self.option, self.generation, self.bestFitness, self.worstFitness, self.restarts, self.elapsed)
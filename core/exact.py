@@ -0,0 +1,113 @@
+from numpy import array as npArray
+
+from .geometry import getGeometry
+from .tracker import maskType, maskValues
+
+"""
+Exact solver: a depth-first search on the bitmasks of a tracker, see tracker module.
+The search always branches on the unknown cell with the fewest possible values (MRV) and every
+assignment removes its value from the peers, fixing the peers left with a single value in turn.
+The bitmasks are plain Python ints, a node only copies a list of DIGIT_NUMBER * DIGIT_NUMBER ints.
+"""
+
+def assign(masks, cell, bit, peers):
+    """
+    Fixes a cell to a value and propagates it to its peers, fixed peers propagate in turn.
+
+    Parameters:
+        - masks (list): Bitmask of every chromosome cell, updated in place
+        - cell (int): Flat chromosome index of the cell
+        - bit (int): Bitmask of the value
+        - peers (list): Peers of every cell
+
+    Return:
+        False if a cell is left without possible value, else True
+    """
+    masks[cell] = bit
+    fixed = [cell]
+    while fixed:
+        cell = fixed.pop()
+        bit = masks[cell]
+        for peer in peers[cell]:
+            mask = masks[peer]
+            if mask & bit:
+                mask &= ~bit
+                if mask == 0:
+                    return False
+                masks[peer] = mask
+                # The peer has a single value left
+                if mask & (mask - 1) == 0:
+                    fixed.append(peer)
+
+    return True
+
+def search(tracker):
+    """
+    A generator function that yields the solutions of a tracker as lists of single-value bitmasks.
+
+    Parameters:
+        - tracker (array): Tracker of the puzzle, the given values are single-value bitmasks
+    """
+    digitNumber = tracker.shape[-1]
+    peers = getGeometry(digitNumber).peerIndexes.tolist()
+    masks = [int(mask) for mask in tracker.reshape(-1)]
+
+    # The fixed cells must not clash with their peers before the search starts
+    for cell, mask in enumerate(masks):
+        if mask == 0:
+            return
+        if mask & (mask - 1) == 0 and not assign(masks, cell, mask, peers):
+            return
+
+    # Each node of the stack is the list of masks of a partial assignment
+    stack = [masks]
+    while stack:
+        masks = stack.pop()
+
+        # Minimum remaining values: branch on the unknown cell with the fewest possible values
+        bestCell, bestCount = -1, digitNumber + 1
+        for cell, mask in enumerate(masks):
+            if mask & (mask - 1):
+                count = bin(mask).count("1")
+                if count < bestCount:
+                    bestCell, bestCount = cell, count
+                    if count == 2:
+                        break
+
+        if bestCell < 0:
+            yield masks
+            continue
+
+        # Push the values in reverse order so the smallest value is tried first
+        mask = masks[bestCell]
+        children = []
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            child = masks[:]
+            if assign(child, bestCell, bit, peers):
+                children.append(child)
+        stack.extend(reversed(children))
+
+def solveExact(tracker):
+    """
+    Returns the first solution of a tracker as a chromosome, None if the puzzle can't be solved.
+    """
+    digitNumber = tracker.shape[-1]
+    for masks in search(tracker):
+        return maskValues(npArray(masks, dtype=maskType(digitNumber))).reshape(digitNumber, digitNumber)
+
+    return None
+
+def countSolutions(tracker, limit=None):
+    """
+    Returns the number of solutions of a tracker, counting stops at "limit" if it is given.
+    A puzzle with a unique solution gives 1 with limit=2.
+    """
+    count = 0
+    for _ in search(tracker):
+        count += 1
+        if count == limit:
+            break
+
+    return count
@@ -1,10 +1,46 @@
-from numpy import zeros
-from .helper import sameColumnIndexes, sameRowIndexes
-from .settings import BLOCK_NUMBER, FITNESS_CHOICE, FitnessOption
+from numpy import arange, bincount, zeros
+from .geometry import getGeometry
+from .tracker import allowedValues
+from .settings import FITNESS_CHOICE, FitnessOption
+
+def countValues(genes, indexes):
+    """
+    Counts the occurrences of every value in each line (row, column or block) of a stack of chromosomes.
+
+    Parameters:
+        - genes (array): (P, DIGIT_NUMBER, DIGIT_NUMBER) stack of chromosomes
+        - indexes (array): (L, DIGIT_NUMBER) flat chromosome indexes of the lines to count, e.g. rows,
+            columns or units of the geometry
+
+    Return:
+        (P, L, DIGIT_NUMBER + 1) array, the count of value v in line k of candidate p is at [p, k, v]
+    """
+    number, lineNumber, binNumber = len(genes), len(indexes), genes.shape[-1] + 1
+    lines = genes.reshape(number, -1)[:, indexes]
+    # Shift every line to its own bin range so one bincount counts them all
+    offsets = (arange(number * lineNumber) * binNumber).reshape(number, lineNumber, 1)
+    counts = bincount((lines + offsets).ravel(), minlength=number * lineNumber * binNumber)
+
+    return counts.reshape(number, lineNumber, binNumber)
+
+def countLines(genes):
+    """
+    Returns the value counts of every row and every column of a stack of chromosomes, see countValues.
+    """
+    geometry = getGeometry(genes.shape[-1])
+    return countValues(genes, geometry.rowIndexes), countValues(genes, geometry.columnIndexes)
+
+def maxFitness(digitNumber):
+    """
+    Returns the fitness of a solution of a grid with "digitNumber" digits, every row and every
+    column holds "digitNumber" different values and no cell holds an invalid value.
+    """
+    return 2 * digitNumber * digitNumber
 
 class Fitness:
-    def __init__(self):
-        self.call = self.getChoice()
+    def __init__(self, option=FITNESS_CHOICE):
+        self.call = self.getChoice(option)
+        self.invalidWeight = self.getInvalidWeight(option)
 
     def getChoice(self, option=FITNESS_CHOICE):
         if option == FitnessOption.DIFFERENT:
@@ -12,76 +48,61 @@ class Fitness:
         elif option == FitnessOption.PERFECT:
             return self.perfectFitness
 
-    def differentFitness(self, candidate, tracker=None):
+    def getInvalidWeight(self, option=FITNESS_CHOICE):
+        """ Returns the penalty of a cell containing an invalid value, it is
+        counted once for the cell's row and once for the cell's column. """
+        if option == FitnessOption.PERFECT:
+            return 2
+        return 0
+
+    def differentFitness(self, genes, tracker=None, counts=None, allowed=None):
         """  The fitness of a candidate solution is determined by
-        total sum of number of different numberals in each row and column
-        
+        total sum of number of different numberals in each row and column.
+        All candidates of the stack are evaluated at once.
+
         Parameters:
-            - candidate (Candidate): The candidate to evaluate
-            - tracker (array): Helper array that determines all possible values for each cell in the chromosome
+            - genes (array): (P, DIGIT_NUMBER, DIGIT_NUMBER) stack of chromosomes to evaluate
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+            - counts (tuple) (optional=None): Row and column value counts of the genes if they are already known, see countLines
+            - allowed (array) (optional=None): Allowed values table of the tracker, unused by this fitness
+
+        Return:
+            Tuple of the (P,) fitness values and the (P, 2, BLOCK_NUMBER) fitness matrices of the candidates
         """
-        rowFitness = 0
-        colFitness = 0
-        candidate.fitnessMatrix = zeros((2, BLOCK_NUMBER), dtype=int)
-
-        # calculate rows duplicates
-        for a, b in sameColumnIndexes(0, 0):
-            row = set()
-            for x, y in sameRowIndexes(a, b):
-                value = candidate.gene[x][y]
-                row.add(value)
-
-            rowFitness += len(row)
-            candidate.fitnessMatrix[0][a // BLOCK_NUMBER] += len(row)
-        
-        for a, b in sameRowIndexes(0, 0):
-            col = set()
-            for x, y in sameColumnIndexes(a, b):
-                value = candidate.gene[x][y]
-                col.add(value)
-
-            colFitness += len(col)
-            candidate.fitnessMatrix[1][a] += len(col)
-
-        return rowFitness + colFitness
-
-    def perfectFitness(self, candidate, tracker=None):
+        number, blockNumber = len(genes), getGeometry(genes.shape[-1]).blockNumber
+        rowCounts, columnCounts = countLines(genes) if counts is None else counts
+
+        # Number of different values in each row and each column
+        rowDifferent = (rowCounts > 0).sum(axis=2)
+        colDifferent = (columnCounts > 0).sum(axis=2)
+
+        # Sum up the scores of each row of sub-grid and each col of sub-grid
+        fitnessMatrix = zeros((number, 2, blockNumber), dtype=int)
+        fitnessMatrix[:, 0] = rowDifferent.reshape(number, blockNumber, blockNumber).sum(axis=2)
+        fitnessMatrix[:, 1] = colDifferent.reshape(number, blockNumber, blockNumber).sum(axis=2)
+
+        return fitnessMatrix.sum(axis=(1, 2)), fitnessMatrix
+
+    def perfectFitness(self, genes, tracker=None, counts=None, allowed=None):
         """  The fitness of a candidate solution is determined by
         sum of number of different numberals in each row and column
-        minus total number of cell that contains invalid value
-        
+        minus total number of cell that contains invalid value.
+        All candidates of the stack are evaluated at once.
+
         Parameters:
-            - candidate (Candidate): The candidate to evaluate
-            - tracker (array): Helper array that determines all possible values for each cell in the chromosome
+            - genes (array): (P, DIGIT_NUMBER, DIGIT_NUMBER) stack of chromosomes to evaluate
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+            - counts (tuple) (optional=None): Row and column value counts of the genes if they are already known, see countLines
+            - allowed (array) (optional=None): Allowed values table of the tracker if it is already known, see allowedValues
+
+        Return:
+            Tuple of the (P,) fitness values and the (P, 2, BLOCK_NUMBER) fitness matrices of the candidates
         """
-        rowFitness = 0
-        colFitness = 0
-        duplicatesCount = 0
-        candidate.fitnessMatrix = zeros((2, BLOCK_NUMBER), dtype=int)
-
-        # calculate rows duplicates
-        for a, b in sameColumnIndexes(0, 0):
-            row = set()
-            for x, y in sameRowIndexes(a, b):
-                value = candidate.gene[x][y]
-                row.add(value)
-                if value not in tracker[x][y]:
-                    duplicatesCount += 1
-
-            rowFitness += len(row)
-            candidate.fitnessMatrix[0][a // BLOCK_NUMBER] += len(row)
-        
-        for a, b in sameRowIndexes(0, 0):
-            col = set()
-            for x, y in sameColumnIndexes(a, b):
-                value = candidate.gene[x][y]
-                col.add(value)
-                if value not in tracker[x][y]:
-                    duplicatesCount += 1
-
-            colFitness += len(col)
-            candidate.fitnessMatrix[1][a] += len(col)
-
-        return rowFitness + colFitness - duplicatesCount
-
-fitness = Fitness()
\ No newline at end of file
+        fitness, fitnessMatrix = self.differentFitness(genes, counts=counts)
+
+        allowed = allowedValues(tracker) if allowed is None else allowed
+        flatGenes = genes.reshape(len(genes), -1)
+        invalidWeight = self.getInvalidWeight(FitnessOption.PERFECT)
+        duplicatesCount = invalidWeight * (~allowed[arange(flatGenes.shape[1]), flatGenes]).sum(axis=1)
+
+        return fitness - duplicatesCount, fitnessMatrix
@@ -0,0 +1,67 @@
+from math import isqrt
+from numpy import arange, argsort, array as npArray, concatenate as npConcatenate, fill_diagonal as fillDiagonal
+from numpy import unique as npUnique
+
+from .settings import DIGIT_NUMBER
+
+class Geometry:
+    """
+    Precomputed index tables of a Sudoku grid with a given number of digits.
+
+    A chromosome cell is addressed by its flat index "block * digitNumber + element" and
+    a grid cell by its flat index "row * digitNumber + column". Unless it is said otherwise,
+    the tables hold flat chromosome indexes so they can gather values from genes directly.
+    """
+    def __init__(self, digitNumber):
+        self.digitNumber = digitNumber
+        self.blockNumber = isqrt(digitNumber)
+        self.cellNumber = digitNumber * digitNumber
+        blockNumber = self.blockNumber
+
+        # Block, row and column of the Sudoku grid that each chromosome cell belongs to
+        positions = arange(self.cellNumber)
+        self.blockOf = positions // digitNumber
+        elements = positions % digitNumber
+        self.rowOf = (self.blockOf // blockNumber) * blockNumber + elements // blockNumber
+        self.columnOf = (self.blockOf % blockNumber) * blockNumber + elements % blockNumber
+
+        # Block-major permutation, gene = grid[encodeIndexes] and grid = gene[decodeIndexes]
+        self.encodeIndexes = self.rowOf * digitNumber + self.columnOf
+        self.decodeIndexes = argsort(self.encodeIndexes)
+
+        # The k-th line of these tables are the cells of the k-th row/column/block, in grid order
+        self.rowIndexes = self.decodeIndexes.reshape(digitNumber, digitNumber)
+        self.columnIndexes = self.rowIndexes.T.copy()
+        self.blockIndexes = positions.reshape(digitNumber, digitNumber)
+        # All the rows, then all the columns, then all the blocks
+        self.unitIndexes = npConcatenate((self.rowIndexes, self.columnIndexes, self.blockIndexes))
+
+        # Peers of a cell are the other cells that share a row, a column or a block with it
+        samePeer = ((self.rowOf.reshape(-1, 1) == self.rowOf)
+            | (self.columnOf.reshape(-1, 1) == self.columnOf)
+            | (self.blockOf.reshape(-1, 1) == self.blockOf))
+        fillDiagonal(samePeer, False)
+        self.peerIndexes = samePeer.nonzero()[1].reshape(self.cellNumber, -1)
+
+        # Every block crosses blockNumber rows and blockNumber columns, for each of these crossings the
+        # k-th line of these tables are the cells of the crossing, the rest of the block and the rest of the line
+        crossings = []
+        for block in range(digitNumber):
+            inBlock = self.blockOf == block
+            for lineOf in (self.rowOf, self.columnOf):
+                for line in npUnique(lineOf[inBlock]):
+                    inLine = lineOf == line
+                    crossings.append(((inBlock & inLine).nonzero()[0], (inBlock & ~inLine).nonzero()[0],
+                        (inLine & ~inBlock).nonzero()[0]))
+        self.crossingIndexes, self.blockRestIndexes, self.lineRestIndexes = map(npArray, zip(*crossings))
+
+geometries = {}
+
+def getGeometry(digitNumber=DIGIT_NUMBER):
+    """
+    Returns the index tables of a Sudoku grid with "digitNumber" digits, they are built once per grid size.
+    """
+    if digitNumber not in geometries:
+        geometries[digitNumber] = Geometry(digitNumber)
+
+    return geometries[digitNumber]
@@ -2,6 +2,7 @@ from core.helper import decodePuzzle, encodePuzzle
 from numpy import zeros
 
 from .candidate import Candidate
+from .validation import conflictMap
 from .settings import DIGIT_NUMBER
 
 class Given:
@@ -27,8 +28,12 @@ class Given:
         if reuse:
             self.bestCandidate = Candidate()
             self.bestCandidate.gene = encodePuzzle(self.values)
-        else:
+        elif self.zeroCandidate.gene.shape == self.values.shape:
             self.bestCandidate = self.zeroCandidate
+        else:
+            # The grid is not of the default size
+            self.bestCandidate = Candidate()
+            self.bestCandidate.gene = zeros(self.values.shape, dtype=int)
 
     def loadValues(self, values):
         """
@@ -37,67 +42,12 @@ class Given:
         self.values = values
         self.resetBestCandidate(True)
 
-    def updateDuplicateValues(self):
+    def updateDuplicateValues(self, gene=None):
         """
-        Update the current duplicate values from the best candidate.
+        Update the current duplicate values from the best candidate, or from the given gene.
         """
-        # Initial duplicate values with zeros
-        self.duplicateValues = zeros((DIGIT_NUMBER, DIGIT_NUMBER), dtype=int)
-        testValues = decodePuzzle(self.bestCandidate.gene)
-        # Check rows for duplicate
-        for i in range(DIGIT_NUMBER):
-            testRowDuplicate = zeros(DIGIT_NUMBER)
-            for j in range(DIGIT_NUMBER):
-                if testValues[i][j] == 0:
-                    continue
-                if testRowDuplicate[testValues[i][j]-1] == 1:
-                    for k in range(j):
-                        if testValues[i][k] == testValues[i][j]:
-                            self.duplicateValues[i][k] += 1
-                            break
-                if testRowDuplicate[testValues[i][j]-1] >= 1:
-                    self.duplicateValues[i][j] += 1
-                testRowDuplicate[testValues[i][j]-1] += 1
-        # Check columns for duplicate
-        for i in range(DIGIT_NUMBER):
-            testColumnDuplicate = zeros(DIGIT_NUMBER)
-            for j in range(DIGIT_NUMBER):
-                if testValues[j][i] == 0:
-                    continue
-                if testColumnDuplicate[testValues[j][i]-1] == 1:
-                    for k in range(j):
-                        if testValues[k][i] == testValues[j][i]:
-                            self.duplicateValues[k][i] += 1
-                            break
-                if testColumnDuplicate[testValues[j][i]-1] >= 1:
-                    self.duplicateValues[j][i] += 1
-                testColumnDuplicate[testValues[j][i]-1] += 1
-        # Check blocks for duplicate
-        for i in range(DIGIT_NUMBER):
-            ii = int(i/3)*3
-            jj = int(i%3)*3
-            testBlockDuplicate = zeros(DIGIT_NUMBER)
-            for j in range(DIGIT_NUMBER):
-                iii = ii + int(j/3)
-                jjj = jj + int(j%3)
-                if testValues[iii][jjj] == 0:
-                    continue
-                if testBlockDuplicate[testValues[iii][jjj]-1] == 1:
-                    for k in range(j):
-                        kki = ii + int(k/3)
-                        kkj = jj + int(k%3)
-                        if testValues[kki][kkj] == testValues[iii][jjj]:
-                            self.duplicateValues[kki][kkj] += 1
-                            break
-                if testBlockDuplicate[testValues[iii][jjj]-1] >= 1:
-                    self.duplicateValues[iii][jjj] += 1
-                testBlockDuplicate[testValues[iii][jjj]-1] += 1
+        testValues = self.bestCandidate.gene if gene is None else gene
+        # Every cell holding a value that appears more than once in one of its units is marked
+        self.duplicateValues = decodePuzzle(conflictMap(testValues).astype(int))
         # Return False if the puzzle hasn't been solve
-        for i in range(DIGIT_NUMBER):
-            for j in range(DIGIT_NUMBER):
-                if (self.duplicateValues[i][j] != 0) or (testValues[i][j] == 0):
-                    return False
-
-        return True
-
-given = Given()
\ No newline at end of file
+        return not (self.duplicateValues.any() or (testValues == 0).any())
@@ -0,0 +1,154 @@
+from multiprocessing import Event, Process, Queue
+from queue import Empty
+from numpy import concatenate as npConcatenate
+from numpy.random import SeedSequence
+
+from .given import Given
+from .context import newContext
+from .sudoku import Sudoku
+from .helper import decodePuzzle
+from .settings import ISLAND_NUMBER, MIGRATION_INTERVAL, MIGRANT_RATE, POPULATION_SIZE, TOPOLOGY_CHOICE, TopologyOption
+
+class Island(Sudoku):
+    """
+    A genetic algorithm solver whose population is one island of an island model.
+    Every few generations the top candidates of the island migrate to another island
+    and the migrants waiting in its inbox replace its worst candidates.
+    """
+    def __init__(self, index, inboxes, stopEvent, interval=MIGRATION_INTERVAL,
+            migrantRate=MIGRANT_RATE, topology=TOPOLOGY_CHOICE, seed=None, context=None):
+        super().__init__(verbose=False, seed=seed, context=context)
+        self.index = index # index of the island
+        self.inboxes = inboxes # migrant queue of every island
+        self.stopEvent = stopEvent # set when any island has found a solution
+        self.interval = interval
+        self.migrantRate = migrantRate
+        self.topology = topology
+
+    def evolve(self, generation):
+        super().evolve(generation)
+        if self.stopEvent.is_set():
+            self.exitFlag = True
+        elif (generation + 1) % self.interval == 0:
+            self.migrate()
+
+    def migrate(self):
+        """
+        Sends the top candidates to the neighbour island and receives the waiting migrants,
+        a single island has no neighbour and does nothing.
+        """
+        islandNumber = len(self.inboxes)
+        if islandNumber < 2:
+            return
+        if self.topology == TopologyOption.RING:
+            target = (self.index + 1) % islandNumber
+        else:
+            target = (self.index + 1 + int(self.rng.integers(0, islandNumber - 1))) % islandNumber
+        migrantNumber = max(1, int(len(self.population) * self.migrantRate))
+        self.inboxes[target].put(self.population.genes[self.population.topIndexes(migrantNumber)])
+
+        migrants = []
+        while True:
+            try:
+                migrants.append(self.inboxes[self.index].get_nowait())
+            except Empty:
+                break
+        if migrants:
+            self.population.immigrate(npConcatenate(migrants), self.trackGrid)
+
+def getResult(results, processes, interval=1.0):
+    """
+    Returns the next result put in a queue by worker processes, without waiting forever for a worker
+    that died.
+
+    Parameters:
+        - results (Queue): Queue the workers put their result in
+        - processes (list): Worker processes
+        - interval (float) (optional=1.0): Seconds between two checks of the workers
+
+    Return:
+        The result, a RuntimeError is raised if a worker failed or if all the workers ended without result
+    """
+    while True:
+        try:
+            return results.get(timeout=interval)
+        except Empty:
+            for process in processes:
+                if process.exitcode not in (None, 0):
+                    raise RuntimeError("%s exited with code %d" % (process.name, process.exitcode))
+            if all(process.exitcode is not None for process in processes):
+                raise RuntimeError("All the workers ended without result")
+
+def runIsland(index, values, seed, config, inboxes, stopEvent, results, options):
+    """
+    Solves a puzzle on one island, it is the target of an island process.
+    The result is put in the results queue and the stop event is set if a solution is found.
+    """
+    # Migrants that are never received must not keep the process alive
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+
+    given = Given()
+    given.loadValues(values)
+    island = Island(index, inboxes, stopEvent, seed=seed, context=newContext(config, given), **options)
+    solved = island.solve()
+    if solved:
+        stopEvent.set()
+
+    results.put({
+        "island": index,
+        "solved": solved,
+        "solution": decodePuzzle(given.bestCandidate.gene).tolist() if solved else None,
+        "fitness": int(given.bestCandidate.fitness),
+        "generations": island.generationCount,
+        "restarts": island.reinitializationCount,
+    })
+
+def solveIslands(values, islandNumber=ISLAND_NUMBER, seed=0, config=None, **options):
+    """
+    Solves a puzzle with an island model: every island evolves its own population in a
+    separate process and they stop as soon as one of them finds a solution. The population
+    size of the configuration is split across the islands, so the islands together evolve as
+    many candidates as a single genetic algorithm.
+
+    Parameters:
+        - values (array): The given values of the puzzle
+        - islandNumber (int) (optional=ISLAND_NUMBER): Number of islands
+        - seed (int) (optional=0): Seed of the puzzle, every island draws from its own child stream of it
+        - config (dict) (optional=None): Operators and parameters of the islands, see newContext
+        - options: interval, migrantRate and topology of the migrations, see Island
+
+    Return:
+        Result dictionary of the island that found a solution, or of the fittest island if none did
+    """
+    inboxes = [Queue() for _ in range(islandNumber)]
+    stopEvent = Event()
+    results = Queue()
+    seeds = SeedSequence(seed).spawn(islandNumber)
+    config = {} if config is None else config
+    populationSize = int(config.get("populationSize", POPULATION_SIZE))
+    # The first islands take the remainder of the split
+    configs = [dict(config, populationSize=populationSize // islandNumber + (k < populationSize % islandNumber))
+        for k in range(islandNumber)]
+    processes = [Process(target=runIsland, args=(k, values, seeds[k], configs[k], inboxes, stopEvent, results, options),
+        daemon=True) for k in range(islandNumber)]
+    for process in processes:
+        process.start()
+
+    best = None
+    try:
+        for _ in range(islandNumber):
+            result = getResult(results, processes)
+            if best is None or result["fitness"] > best["fitness"] or result["solved"]:
+                best = result
+            if result["solved"]:
+                break
+    finally:
+        stopEvent.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    best["seed"] = seed
+    return best
@@ -1,130 +1,193 @@
-import random
-from .settings import DIGIT_NUMBER, MUTATION_CHOICE, MutationOption
+from numpy import argsort, arange, concatenate as npConcatenate, floor, full, repeat, tile, triu_indices
+from .adaptation import ProbabilityMatching
+from .settings import MUTATION_CHOICE, MutationOption
+
+def freeCells(given):
+    """
+    Returns the unknown cells of every sub-block of the given chromosome.
+
+    Return:
+        Tuple of a (DIGIT_NUMBER, DIGIT_NUMBER) array whose k-th line starts with the indexes of the
+        unknown cells of the k-th sub-block, and the (DIGIT_NUMBER,) number of unknown cells of each sub-block
+    """
+    known = given != 0
+    return argsort(known, axis=1, kind="stable"), (~known).sum(axis=1)
+
+def freePairs(given):
+    """
+    Returns every swap of two unknown cells of a sub-block of the given chromosome.
+
+    Return:
+        Tuple of the (S,) sub-blocks, first cells and second cells of the swaps
+    """
+    cells, counts = freeCells(given)
+    digitNumber = len(given)
+    firstSlots, secondSlots = triu_indices(digitNumber, 1)
+    blocks = repeat(arange(digitNumber), len(firstSlots))
+    firstSlots, secondSlots = tile(firstSlots, digitNumber), tile(secondSlots, digitNumber)
+    # The slots of a sub-block past its number of unknown cells hold known cells
+    valid = secondSlots < counts[blocks]
+    blocks, firstSlots, secondSlots = blocks[valid], firstSlots[valid], secondSlots[valid]
+
+    return blocks, cells[blocks, firstSlots], cells[blocks, secondSlots]
+
+def mergeRounds(*roundLists):
+    """
+    Merges swap rounds of disjoint sets of candidates, the k-th rounds of every list are applied together.
+    """
+    rounds = []
+    for k in range(max(map(len, roundLists))):
+        parts = [roundList[k] for roundList in roundLists if len(roundList) > k]
+        rounds.append(tuple(npConcatenate(arrays) for arrays in zip(*parts)))
+
+    return rounds
 
 class Mutation:
-    def __init__(self):
-        self.call = self.getChoice()
+    """ Mutation operators do not modify the genes themselves, they mutate many candidates at once
+    and return the list of swap rounds to perform on them. A swap exchanges the values of two cells
+    of the same sub-block, so the population can apply them and update its fitness incrementally.
+    A round is a tuple of (indexes, blocks, firstIndexes, secondIndexes) arrays, with at most one
+    swap per candidate. Every operator draws its random numbers from the numpy Generator it is given.
+
+    The random mutation and the number of swaps of the multi swap mutation are chosen by adaptive
+    operator selection, see credit. """
+    def __init__(self, option=MUTATION_CHOICE):
+        self.batchCall = self.getBatchChoice(option)
+        # Weights of batchSwapMutate and batchRandomResetMutate in batchRandomMutate
+        self.randomWeights = ProbabilityMatching([0.8, 0.2])
+        # Weights of 1 to 5 swaps in batchMultiSwapMutate
+        self.swapWeights = ProbabilityMatching([0.625, 0.304, 0.066, 0.005, 0.0001])
+        # Weights and arm of every candidate of the last batch mutation, until they are credited
+        self.pending = None
 
-    def getChoice(self, option=MUTATION_CHOICE):
+    def getBatchChoice(self, option=MUTATION_CHOICE):
         if option == MutationOption.RANDOM:
-            return self.randomMutate
+            return self.batchRandomMutate
         elif option == MutationOption.SWAP:
-            return self.swapMutate
+            return self.batchSwapMutate
         elif option == MutationOption.MULTI_SWAP:
-            return self.multiSwapMutate
+            return self.batchMultiSwapMutate
         elif option == MutationOption.ALL_SWAP:
-            return self.allSwapMutate
+            return self.batchAllSwapMutate
         elif option == MutationOption.RANDOM_RESET:
-            return self.randomResetMutate
-
-    def randomMutate(self, candidate, given):
-        randomMethods = [self.swapMutate, self.randomResetMutate]
-        randomWeights = [0.8, 0.2]
-        method = random.choices(randomMethods, weights=randomWeights)[0]
-        return method(candidate, given)
-
-    def swapMutate(self, candidate, given):
-        """  Mutate a candidate gene. Two numerals within a
-        sub-block that are not given in the starting point are 
-        selected randomly and their positions are swapped.
-        
+            return self.batchRandomResetMutate
+
+    def credit(self, improvements):
+        """ Credits the arms of the candidates of the last batch mutation with their fitness improvements,
+        it does nothing if the batch operator has no adaptive choice.
+
         Parameters:
-            - candidate (Candidate): The candidate to mutate
+            - improvements (array): Fitness change of every mutated candidate, in the order of their indexes
+        """
+        if self.pending is not None:
+            weights, arms = self.pending
+            self.pending = None
+            weights.credit(arms, improvements)
+
+    def batchRandomMutate(self, indexes, given, rng):
+        """  Mutate each candidate by a swap mutation or a random reset mutation.
+
+        Parameters:
+            - indexes (array): Indexes of the candidates to mutate
             - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - rng (Generator): Random number generator
+
+        Return:
+            List of swap rounds to perform on the candidates
         """
-        randomBlock = random.randint(0, DIGIT_NUMBER - 1)
-        possibleSwaps = []
-        success = False
-
-        # Get all unknown cells index
-        for blockElementIndex in range(DIGIT_NUMBER):
-            if given[randomBlock][blockElementIndex] == 0:
-                possibleSwaps.append(blockElementIndex)
-
-        # Select two indexes and swap their values
-        if len(possibleSwaps) > 1:
-            success = True
-            random.shuffle(possibleSwaps)
-            firstIndex, secondIndex = random.choices(possibleSwaps, k=2)
-            tmp = candidate.gene[randomBlock][firstIndex]
-            candidate.gene[randomBlock][firstIndex] = candidate.gene[randomBlock][secondIndex]
-            candidate.gene[randomBlock][secondIndex] = tmp
-        
-        return success
-
-    def multiSwapMutate(self, candidate, given):
-        """  Mutate a candidate gene. Performs 1 to 5 swap mutations to the candidate gene
-        
+        methods = self.randomWeights.choose(rng, len(indexes))
+        self.pending = (self.randomWeights, methods)
+        reset = methods == 1
+        return mergeRounds(self.batchSwapMutate(indexes[~reset], given, rng),
+            self.batchRandomResetMutate(indexes[reset], given, rng))
+
+    def batchSwapMutate(self, indexes, given, rng, blocks=None):
+        """  Mutate each candidate. Two numerals within a random sub-block that are not
+        given in the starting point are selected randomly and their positions are swapped.
+
         Parameters:
-            - candidate (Candidate): The candidate to mutate
+            - indexes (array): Indexes of the candidates to mutate
             - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - rng (Generator): Random number generator
+            - blocks (array) (optional=None): Sub-block to mutate for each candidate, random if it's not given
+
+        Return:
+            List of swap rounds to perform on the candidates
+        """
+        cells, counts = freeCells(given)
+        if blocks is None:
+            blocks = rng.integers(0, len(given), len(indexes))
+
+        # Only sub-blocks with more than one unknown cell can be mutated
+        valid = counts[blocks] > 1
+        indexes, blocks = indexes[valid], blocks[valid]
+        picks = floor(rng.random((2, len(indexes))) * counts[blocks]).astype(int)
+
+        return [(indexes, blocks, cells[blocks, picks[0]], cells[blocks, picks[1]])]
+
+    def batchMultiSwapMutate(self, indexes, given, rng):
+        """  Mutate each candidate. Performs 1 to 5 swap mutations to the candidate.
+
+        Parameters:
+            - indexes (array): Indexes of the candidates to mutate
+            - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - rng (Generator): Random number generator
+
+        Return:
+            List of swap rounds to perform on the candidates
         """
-        self.weights = [0.625, 0.304, 0.066, 0.005, 0.0001]
         # Randomly select 1 to 5 swap actions to perform
-        numSwap = random.choices(list(range(1, 6)), weights=self.weights, k=1)[0]
-        success = False
-
-        for _ in range(numSwap):
-            randomBlock = random.randint(0, DIGIT_NUMBER - 1)
-            possibleSwaps = []
-            # Get all unknown cells index
-            for blockElementIndex in range(DIGIT_NUMBER):
-                if given[randomBlock][blockElementIndex] == 0:
-                    possibleSwaps.append(blockElementIndex)
-
-            # Select two indexes and swap their values
-            if len(possibleSwaps) > 1:
-                success = True
-                random.shuffle(possibleSwaps)
-                firstIndex, secondIndex = random.choices(possibleSwaps, k=2)
-                tmp = candidate.gene[randomBlock][firstIndex]
-                candidate.gene[randomBlock][firstIndex] = candidate.gene[randomBlock][secondIndex]
-                candidate.gene[randomBlock][secondIndex] = tmp
-        
-        return success
-
-    def allSwapMutate(self, candidate, given):
-        """  Mutate a candidate gene. Performs swap mutations to each sub-block in 
-        the gene with a rate of 16%.
-        
+        numSwaps = self.swapWeights.choose(rng, len(indexes)) + 1
+        self.pending = (self.swapWeights, numSwaps - 1)
+
+        rounds = []
+        for k in range(numSwaps.max(initial=0)):
+            rounds.extend(self.batchSwapMutate(indexes[numSwaps > k], given, rng))
+
+        return rounds
+
+    def batchAllSwapMutate(self, indexes, given, rng):
+        """  Mutate each candidate. Performs swap mutations to each sub-block of the
+        candidate with a rate of 16%.
+
         Parameters:
-            - candidate (Candidate): The candidate to mutate
+            - indexes (array): Indexes of the candidates to mutate
             - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - rng (Generator): Random number generator
+
+        Return:
+            List of swap rounds to perform on the candidates
         """
-        for block in range(DIGIT_NUMBER):
-            if random.random() < 0.16:
-                possibleSwaps = []
-                for blockElementIndex in range(DIGIT_NUMBER):
-                    if given[block][blockElementIndex] == 0:
-                        possibleSwaps.append(blockElementIndex)
-                if len(possibleSwaps) > 1:
-                    random.shuffle(possibleSwaps)
-                    firstIndex, secondIndex = random.choices(possibleSwaps, k=2)
-                    tmp = candidate.gene[block][firstIndex]
-                    candidate.gene[block][firstIndex] = candidate.gene[block][secondIndex]
-                    candidate.gene[block][secondIndex] = tmp
-        
-        return True
-
-    def randomResetMutate(self, candidate, given):
-        """  Mutate a candidate gene. Selects a sub-block and sets randomly values to
-        all cells contain unknown value in the statring Sudoku puzzle
-        
+        rounds = []
+        mutated = rng.random((len(given), len(indexes))) < 0.16
+        for block in range(len(given)):
+            blockIndexes = indexes[mutated[block]]
+            rounds.extend(self.batchSwapMutate(blockIndexes, given, rng, blocks=full(len(blockIndexes), block)))
+
+        return rounds
+
+    def batchRandomResetMutate(self, indexes, given, rng):
+        """  Mutate each candidate. Selects a sub-block and sets randomly values to all cells
+        contain unknown value in the starting Sudoku puzzle, the unknown cells are shuffled.
+
         Parameters:
-            - candidate (Candidate): The candidate to mutate
+            - indexes (array): Indexes of the candidates to mutate
             - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - rng (Generator): Random number generator
+
+        Return:
+            List of swap rounds to perform on the candidates
         """
-        randomBlock = random.randint(0, DIGIT_NUMBER - 1)
-        possibleValues = list(range(1, DIGIT_NUMBER + 1))
-        for blockElementIndex in range(DIGIT_NUMBER):
-            if given[randomBlock][blockElementIndex] != 0:
-                possibleValues.remove(given[randomBlock][blockElementIndex])
-
-        random.shuffle(possibleValues)
-        for blockElementIndex in range(DIGIT_NUMBER):
-            if given[randomBlock][blockElementIndex] == 0:
-                candidate.gene[randomBlock][blockElementIndex] = possibleValues.pop()
-        
-        return True
-
-mutation = Mutation()
\ No newline at end of file
+        cells, counts = freeCells(given)
+        blocks = rng.integers(0, len(given), len(indexes))
+        blockCounts = counts[blocks]
+
+        # Fisher-Yates shuffle, the k-th round swaps the k-th unknown cell with a random previous one
+        rounds = []
+        for k in range(blockCounts.max(initial=0) - 1, 0, -1):
+            shuffled = blockCounts > k
+            shuffledBlocks = blocks[shuffled]
+            picks = floor(rng.random(len(shuffledBlocks)) * (k + 1)).astype(int)
+            rounds.append((indexes[shuffled], shuffledBlocks, cells[shuffledBlocks, k], cells[shuffledBlocks, picks]))
+
+        return rounds
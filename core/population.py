@@ -1,21 +1,64 @@
-import random
-from numpy import copy as npCopy
+from numpy import arange, argsort, int8, maximum, zeros, tile, copy as npCopy, array as npArray, concatenate as npConcatenate
+from numpy.random import default_rng
 
 from .candidate import Candidate
-from .selection import selection
-from .crossover import crossover
-from .settings import DIGIT_NUMBER, MUTATION_RATE, POPULATION_SIZE, ELITE_NUMBER, CROSSOVER_RATE
+from .context import Context
+from .selection import topIndexes
+from .mutation import freePairs
+from .fitness import countLines
+from .tracker import allowedValues
+from .geometry import getGeometry
+from .timer import PhaseTimer
+from .settings import DIGIT_NUMBER, BLOCK_NUMBER
+from .settings import LOCAL_SEARCH_FRACTION, LOCAL_SEARCH_DEPTH, LOCAL_SEARCH_SWAPS
+
+# Genes only hold digits in [0, DIGIT_NUMBER], so a small int type is enough
+GENE_TYPE = int8
 
 class Population:
     """ A set of candidate solutions to the Sudoku puzzle. These candidates are also known as
-    the chromosomes in the population. """
-    def __init__(self):
-        self.candidates = []
-        self.populationSize = POPULATION_SIZE
-        self.elitism = ELITE_NUMBER
-        self.mutationRate = MUTATION_RATE
-        self.crossoverRate = CROSSOVER_RATE
-    
+    the chromosomes in the population.
+
+    The whole population is stored as tensors: the genes of all candidates live in one
+    contiguous (P, DIGIT_NUMBER, DIGIT_NUMBER) array, and their fitness values and fitness
+    matrices live in parallel (P,) and (P, 2, BLOCK_NUMBER) arrays. Candidates are referenced
+    by their index in these arrays.
+
+    The value counts of every row and column of each candidate are kept along with the genes,
+    so a swap of two cells updates the fitness incrementally instead of rescanning the grid.
+
+    Candidates are not kept in fitness order, only the index of the best candidate and
+    the worst fitness value are tracked after every change of the population.
+
+    The grid size is the one of the given chromosome, DIGIT_NUMBER only sizes the empty population.
+    The genetic operators and parameters are the ones of the context, see Context. """
+    def __init__(self, rng=None, timer=None, context=None):
+        # Genetic operators and parameters of the solver, the ones of the settings if it's not given
+        self.context = Context() if context is None else context
+        self.genes = zeros((0, DIGIT_NUMBER, DIGIT_NUMBER), dtype=GENE_TYPE)
+        self.fitness = zeros(0, dtype=int)
+        self.fitnessMatrices = zeros((0, 2, BLOCK_NUMBER), dtype=int)
+        self.rowCounts = zeros((0, DIGIT_NUMBER, DIGIT_NUMBER + 1), dtype=int)
+        self.columnCounts = zeros((0, DIGIT_NUMBER, DIGIT_NUMBER + 1), dtype=int)
+        self.allowed = None # (DIGIT_NUMBER * DIGIT_NUMBER, DIGIT_NUMBER + 1) allowed values table of the tracker
+        self.bestIndex = 0 # index of the fittest candidate
+        self.bestFitness = 0
+        self.worstFitness = 0
+        # Random number generator of every operator, a seed or a fresh one if it's not given
+        self.rng = default_rng(rng)
+        # Time spent in each phase of the next generation process
+        self.timer = PhaseTimer() if timer is None else timer
+        self.populationSize = self.context.populationSize
+        self.elitism = self.context.eliteNumber
+        self.mutationRate = self.context.mutationRate
+        self.crossoverRate = self.context.crossoverRate
+        self.localSearchFraction = LOCAL_SEARCH_FRACTION
+        self.localSearchDepth = LOCAL_SEARCH_DEPTH
+        self.localSearchSwaps = LOCAL_SEARCH_SWAPS
+
+    def __len__(self):
+        return len(self.genes)
+
     def initializeCandidates(self, number, given, tracker):
         """
         Generates an initial population of size "number".
@@ -26,93 +69,251 @@ class Population:
             - tracker (array): Helper array to help evaluate candidates' fitness
         """
 
-        self.candidates = []
-        for _ in range(number):
-            candidate = Candidate()
-            # For each sub grid of candidate
-            for i in range(DIGIT_NUMBER):
-                # Generate a list of possible value to fill in
-                shuffledBlock = list(range(1, DIGIT_NUMBER + 1))
+        # Every candidate starts as a copy of the given values
+        genes = tile(npArray(given, dtype=GENE_TYPE), (number, 1, 1))
 
-                # Remove all the given values in this sub grid of the given chromosome from possible values list
-                for j in range(DIGIT_NUMBER):
-                    if given[i][j] != 0:
-                        candidate.gene[i][j] = given[i][j]
+        # For each sub grid, fill the unknown cells of every candidate at once
+        digitNumber = len(given)
+        for i in range(digitNumber):
+            # Unknown cells of this sub grid and the values missing from it
+            freeIndexes = [j for j in range(digitNumber) if given[i][j] == 0]
+            missingValues = npArray(sorted(set(range(1, digitNumber + 1)) - set(given[i])), dtype=GENE_TYPE)
+            if len(freeIndexes) == 0:
+                continue
 
-                        shuffledBlock.remove(given[i][j])
+            # One random permutation of the missing values per candidate
+            permutations = argsort(self.rng.random((number, len(freeIndexes))), axis=1)
+            genes[:, i, freeIndexes] = missingValues[permutations]
 
-                # Shuffle the list so that possible values can be filled in randomly
-                random.shuffle(shuffledBlock)
-                for j in range(DIGIT_NUMBER):
-                    # Fill possible value to unknown cell in the sub grid
-                    if given[i][j] == 0:
-                        candidate.gene[i][j] = shuffledBlock.pop()
+        self.genes = genes
 
-            self.candidates.append(candidate)
-        
         # Evaluate fitness for the population
         self.evaluate(tracker)
 
-    def localSearch(self, coef, given, tracker):
-        newPopulation = []
-        for candidate in self.candidates:
-            newPopulation.extend(candidate.localSearch(coef, given))
-        
-        list(map(lambda x: x.updateFitness(tracker), newPopulation))
-        
-        newPopulation.sort(key = lambda x: -x.fitness)
-        topNum = 10
-        topFit = newPopulation[:topNum]
-        newPopulation = newPopulation[topNum:]
-        # random.shuffle(newPopulation)
-        self.candidates = topFit + random.choices(newPopulation, k=self.populationSize - topNum)
-    
-    def sort(self):
-        """ Sort the population based on fitness. """
-        self.candidates.sort(key = lambda x: -x.fitness)
-    
+    def loadGenes(self, genes, tracker):
+        """
+        Replaces the population by the given genes and evaluates them.
+
+        Parameters:
+            - genes (array): (P, DIGIT_NUMBER, DIGIT_NUMBER) array of chromosomes
+            - tracker (array): Helper array to help evaluate candidates' fitness
+        """
+        self.genes = npArray(genes, dtype=GENE_TYPE)
+        self.evaluate(tracker)
+
+    def immigrate(self, genes, tracker):
+        """
+        Replaces the worst candidates of the population by candidates coming from another population.
+
+        Parameters:
+            - genes (array): (M, DIGIT_NUMBER, DIGIT_NUMBER) array of the migrants' chromosomes
+            - tracker (array): Helper array to help evaluate candidates' fitness
+        """
+        number = min(len(genes), len(self.genes) - 1)
+        self.genes[topIndexes(-self.fitness, number)] = genes[:number]
+        self.evaluate(tracker)
+
+    def getCandidate(self, index=None):
+        """
+        Returns a standalone copy of a candidate of the population, the best one by default.
+        """
+        index = self.bestIndex if index is None else index
+        candidate = Candidate()
+        candidate.gene = self.genes[index].astype(int)
+        candidate.fitness = int(self.fitness[index])
+        candidate.fitnessMatrix = npCopy(self.fitnessMatrices[index])
+        return candidate
+
+    def localSearch(self, given):
+        """
+        Improves the fittest candidates by hill climbing, it is the memetic stage of the genetic algorithm.
+        At each step, every swap of two unknown cells of a sub-block is scored for all the candidates
+        at once with swapDelta and each candidate makes its best swap, ties are broken at random.
+        A candidate stops when no swap improves its fitness. The localSearchFraction fittest candidates
+        are improved by up to localSearchDepth swaps.
+
+        The number of swaps grows with the cube of the number of digits, so a step scores a random
+        subset of localSearchSwaps swaps on larger grids to keep its cost bounded.
+
+        Parameters:
+            - given (array): The given chromosome of the Sudoku problem
+        """
+        blocks, firstCells, secondCells = freePairs(given)
+        if len(blocks) == 0:
+            return
+        digitNumber = len(given)
+        swapNumber = min(len(blocks), self.localSearchSwaps)
+
+        indexes = self.topIndexes(int(len(self.genes) * self.localSearchFraction))
+        for _ in range(self.localSearchDepth):
+            if len(indexes) == 0:
+                break
+            swaps = arange(len(blocks)) if swapNumber == len(blocks) else \
+                self.rng.choice(len(blocks), swapNumber, replace=False)
+            firstPositions = blocks[swaps] * digitNumber + firstCells[swaps]
+            secondPositions = blocks[swaps] * digitNumber + secondCells[swaps]
+            delta, _ = self.swapDelta(indexes.repeat(swapNumber),
+                tile(firstPositions, len(indexes)), tile(secondPositions, len(indexes)))
+            delta = delta.reshape(len(indexes), swapNumber)
+            # Fitness changes are integers, the random fraction only breaks the ties
+            best = (delta + self.rng.random(delta.shape) * 0.5).argmax(axis=1)
+            improved = delta[arange(len(indexes)), best] > 0
+            indexes, best = indexes[improved], swaps[best[improved]]
+            self.swapCells(indexes, blocks[best], firstCells[best], secondCells[best])
+
+        self.track()
+        self.timer.lap("localSearch")
+
+    def track(self):
+        """ Update the best candidate and the worst fitness value of the population. """
+        self.bestIndex = int(self.fitness.argmax())
+        self.bestFitness = int(self.fitness[self.bestIndex])
+        self.worstFitness = int(self.fitness.min())
+
+    def topIndexes(self, number):
+        """ Returns the indexes of the "number" fittest candidates, in no particular order. """
+        return topIndexes(self.fitness, number)
+
     def evaluate(self, tracker):
-        """ Evaluate fitness of every candidate/chromosome in the population. """
-        list(map(lambda x: x.updateFitness(tracker), self.candidates))
-        self.sort()
+        """ Evaluate fitness of every candidate/chromosome in the population from scratch. """
+        self.allowed = allowedValues(tracker)
+        self.rowCounts, self.columnCounts = countLines(self.genes)
+        self.fitness, self.fitnessMatrices = self.context.fitness.call(self.genes, tracker,
+            (self.rowCounts, self.columnCounts), self.allowed)
+        self.track()
+
+    def swapDelta(self, indexes, firstPositions, secondPositions):
+        """
+        Returns the change of fitness of swapping two cells of a sub-block for several candidates,
+        without swapping them. Only the two rows and two columns crossing the cells are looked at.
+
+        Parameters:
+            - indexes (array): Indexes of the candidates, a candidate may appear several times
+            - firstPositions (array): Flat chromosome index of the first cell for each swap
+            - secondPositions (array): Flat chromosome index of the second cell for each swap
+
+        Return:
+            Tuple of the (N,) fitness changes and the (2, N) changes of the row and column scores
+        """
+        flatGenes = self.genes.reshape(len(self.genes), -1)
+        firstValues = flatGenes[indexes, firstPositions]
+        secondValues = flatGenes[indexes, secondPositions]
+
+        lineDeltas = zeros((2, len(indexes)), dtype=int)
+        geometry = getGeometry(self.genes.shape[-1])
+        for counts, lineOf, side in ((self.rowCounts, geometry.rowOf, 0), (self.columnCounts, geometry.columnOf, 1)):
+            firstLines = lineOf[firstPositions]
+            secondLines = lineOf[secondPositions]
+            # Values only move between lines if both cells are on different lines
+            moved = (firstLines != secondLines) & (firstValues != secondValues)
+            lineDeltas[side] = moved * (
+                (counts[indexes, firstLines, secondValues] == 0).astype(int)
+                - (counts[indexes, firstLines, firstValues] == 1)
+                + (counts[indexes, secondLines, firstValues] == 0)
+                - (counts[indexes, secondLines, secondValues] == 1))
+        delta = lineDeltas.sum(axis=0)
+
+        # Penalty of the cells that contain invalid values, before and after the swap
+        invalidWeight = self.context.fitness.invalidWeight
+        if invalidWeight:
+            allowed = self.allowed
+            delta -= invalidWeight * (
+                (~allowed[firstPositions, secondValues]).astype(int)
+                + ~allowed[secondPositions, firstValues]
+                - ~allowed[firstPositions, firstValues]
+                - ~allowed[secondPositions, secondValues])
+
+        return delta, lineDeltas
+
+    def swapCells(self, indexes, blocks, firstCells, secondCells):
+        """
+        Swaps two cells of a sub-block for several candidates at once and updates their
+        fitness from the row and column value counts, see swapDelta.
+
+        Parameters:
+            - indexes (array): Indexes of the candidates to mutate, each candidate at most once
+            - blocks (array): Sub-block of the swap for each candidate
+            - firstCells (array): First swapped cell in the sub-block for each candidate
+            - secondCells (array): Second swapped cell in the sub-block for each candidate
+        """
+        geometry = getGeometry(self.genes.shape[-1])
+        flatGenes = self.genes.reshape(len(self.genes), -1)
+        firstPositions = blocks * geometry.digitNumber + firstCells
+        secondPositions = blocks * geometry.digitNumber + secondCells
+        firstValues = flatGenes[indexes, firstPositions]
+        secondValues = flatGenes[indexes, secondPositions]
+        delta, lineDeltas = self.swapDelta(indexes, firstPositions, secondPositions)
+
+        blockNumber = geometry.blockNumber
+        for counts, lineOf, side in ((self.rowCounts, geometry.rowOf, 0), (self.columnCounts, geometry.columnOf, 1)):
+            firstLines = lineOf[firstPositions]
+            secondLines = lineOf[secondPositions]
+            moved = (firstLines != secondLines) & (firstValues != secondValues)
+            counts[indexes, firstLines, firstValues] -= moved
+            counts[indexes, firstLines, secondValues] += moved
+            counts[indexes, secondLines, secondValues] -= moved
+            counts[indexes, secondLines, firstValues] += moved
+            # Both cells of a sub-block are on the same row of sub-grid and the same col of sub-grid
+            self.fitnessMatrices[indexes, side, blocks // blockNumber if side == 0 else blocks % blockNumber] += lineDeltas[side]
+
+        flatGenes[indexes, firstPositions] = secondValues
+        flatGenes[indexes, secondPositions] = firstValues
+        self.fitness[indexes] += delta
+
+    def mutate(self, indexes, given, method=None):
+        """
+        Mutates the candidates at "indexes" and updates their fitness incrementally.
+
+        Parameters:
+            - indexes (array): Indexes of the candidates to mutate
+            - given (array): The given chromosome of the Sudoku problem
+            - method (function) (optional=None): Batch mutation operator, the chosen one if it's not given
+        """
+        mutation = self.context.mutation
+        method = mutation.batchCall if method is None else method
+        previousFitness = self.fitness[indexes]
+        # A candidate appears at most once per round, so every round is applied at once
+        for roundIndexes, blocks, firstCells, secondCells in method(indexes, given, self.rng):
+            self.swapCells(roundIndexes, blocks, firstCells, secondCells)
+        # The adaptive choices of the operator learn from the fitness changes
+        mutation.credit(self.fitness[indexes] - previousFitness)
 
     def nextGen(self, given, tracker):
-        """ 
+        """
         Find the next generation of the population".
 
         Parameters:
             - given (array): The given chromosome of the Sudoku problem, helps in mutation process of candidates
             - tracker (array): Helper array to help evaluate candidates' fitness
         """
-        elites = []
         numElite = self.elitism
+        numChildren = self.populationSize - numElite
+
+        # Select parents by index, two consecutive indexes make a couple
+        selectIndexes = self.context.selection.call(self.fitness, numChildren + numChildren % 2, self.rng)
+        firstParents = selectIndexes[0::2]
+        secondParents = selectIndexes[1::2]
+        parentFitness = maximum(self.fitness[firstParents], self.fitness[secondParents])
+        self.timer.lap("selection")
+
+        # Crossover every couple at once to generate new children for next generation with a crossover rate
+        children = self.context.crossover.call(self.genes, self.fitnessMatrices, firstParents, secondParents,
+            self.crossoverRate, self.rng)
+        children = children[:numChildren]
+        self.timer.lap("crossover")
 
-        # Extract top candidate from population. These elite candidates will 
+        # Extract top candidate from population. These elite candidates will
         # go to the next generation without any change
-        for i in range(numElite):
-            elite = Candidate()
-            elite.gene = npCopy(self.candidates[i].gene)
-            elites.append(elite)
-
-        selectCandidates = selection.call(self.candidates, self.populationSize - numElite)
-
-        newPopulation = []
-        for _ in range(0, self.populationSize - numElite, 2):
-            # Select 2 parents
-            parents = [selectCandidates.pop(), selectCandidates.pop()]
-            # parents = selection.call(self.candidates, 2)
-
-            # Crossover them to generate new child for next generation with a crossover rate
-            child1, child2 = crossover.call(parents[0], parents[1], self.crossoverRate)
-
-            # Add child to the next genration population
-            newPopulation.append(child1)
-            newPopulation.append(child2)
-        
-        self.candidates = newPopulation
-        # Mutate candidates in the next generation with a mutation rate
-        list(map(lambda x: x.mutate(self.mutationRate, given), self.candidates))
-        self.candidates.extend(elites)
-
-        # Evaluate fitness for the next generation
-        self.evaluate(tracker)
\ No newline at end of file
+        self.genes = npConcatenate((children, self.genes[self.topIndexes(numElite)]))
+
+        # Evaluate fitness for the next generation, crossover replaces whole sub-blocks so it is done from scratch
+        self.evaluate(tracker)
+        # The adaptive choices of the operator learn from the children that beat their fitter parent
+        couples = arange(numChildren) % len(firstParents)
+        self.context.crossover.credit(couples, self.fitness[:numChildren] - parentFitness[couples])
+        self.timer.lap("evaluation")
+
+        # Mutate candidates in the next generation with a mutation rate, their fitness is updated by the swaps
+        self.mutate((self.rng.random(numChildren) < self.mutationRate).nonzero()[0], given)
+        self.track()
+        self.timer.lap("mutation")
@@ -0,0 +1,97 @@
+from multiprocessing import Event, Process, Queue
+from numpy.random import SeedSequence
+
+from .given import Given
+from .context import newContext
+from .sudoku import Sudoku
+from .helper import decodePuzzle
+from .island import getResult
+
+# Operator choices raced against each other, written with the names of the options in settings
+PORTFOLIO = [
+    {"fitness": "PERFECT", "mutation": "MULTI_SWAP", "selection": "TOP", "crossover": "HALF"},
+    {"fitness": "PERFECT", "mutation": "SWAP", "selection": "TOP", "crossover": "CHOICE"},
+    {"fitness": "PERFECT", "mutation": "RANDOM", "selection": "TOURNAMENT", "crossover": "ROW_COL"},
+    {"fitness": "DIFFERENT", "mutation": "MULTI_SWAP", "selection": "TOP", "crossover": "UNIFORM"},
+    {"fitness": "PERFECT", "mutation": "ALL_SWAP", "selection": "RANKING", "crossover": "RANDOM"},
+    {"fitness": "PERFECT", "mutation": "MULTI_SWAP", "selection": "TOURNAMENT", "crossover": "TWO_POINT"},
+]
+
+class Racer(Sudoku):
+    """
+    A genetic algorithm solver that gives up as soon as another racer has found a solution.
+    """
+    def __init__(self, stopEvent, seed=None, context=None):
+        super().__init__(verbose=False, seed=seed, context=context)
+        self.stopEvent = stopEvent # set when any racer has found a solution
+
+    def evolve(self, generation):
+        super().evolve(generation)
+        if self.stopEvent.is_set():
+            self.exitFlag = True
+
+def runRacer(index, values, seed, config, stopEvent, results):
+    """
+    Solves a puzzle with one configuration, it is the target of a racer process.
+    The result is put in the results queue and the stop event is set if a solution is found.
+    """
+    given = Given()
+    given.loadValues(values)
+    racer = Racer(stopEvent, seed, newContext(config, given))
+    solved = racer.solve()
+    if solved:
+        stopEvent.set()
+
+    results.put({
+        "racer": index,
+        "config": config,
+        "solved": solved,
+        "solution": decodePuzzle(given.bestCandidate.gene).tolist() if solved else None,
+        "fitness": int(given.bestCandidate.fitness),
+        "generations": racer.generationCount,
+        "restarts": racer.reinitializationCount,
+    })
+
+def solvePortfolio(values, racerNumber=len(PORTFOLIO), seed=0, configs=PORTFOLIO, config=None):
+    """
+    Races differently configured solvers on a puzzle, each one in its own process.
+    The first solution wins and the other racers are cancelled.
+
+    Parameters:
+        - values (array): The given values of the puzzle
+        - racerNumber (int) (optional=len(PORTFOLIO)): Number of racers, configurations are reused
+            with other random streams when there are more racers than configurations
+        - seed (int) (optional=0): Seed of the puzzle, every racer draws from its own child stream of it
+        - configs (list) (optional=PORTFOLIO): Configurations to race, see newContext
+        - config (dict) (optional=None): Configuration shared by the racers, e.g. a tuned profile, every
+            racer overrides it with its own operators
+
+    Return:
+        Result dictionary of the winning racer with its configuration, or of the fittest racer if none did
+    """
+    configs = [dict(config or {}, **racerConfig) for racerConfig in configs]
+    stopEvent = Event()
+    results = Queue()
+    seeds = SeedSequence(seed).spawn(racerNumber)
+    processes = [Process(target=runRacer, args=(k, values, seeds[k], configs[k % len(configs)], stopEvent, results),
+        daemon=True) for k in range(racerNumber)]
+    for process in processes:
+        process.start()
+
+    best = None
+    try:
+        for _ in range(racerNumber):
+            result = getResult(results, processes)
+            if best is None or result["fitness"] > best["fitness"] or result["solved"]:
+                best = result
+            if result["solved"]:
+                break
+    finally:
+        stopEvent.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    best["seed"] = seed
+    return best
@@ -0,0 +1,200 @@
+from itertools import combinations
+from numpy import arange, array as npArray, bitwise_or, repeat, where, zeros
+
+from .geometry import getGeometry
+from .tracker import countBits, fullMask, isSingle, peerMasks
+
+"""
+Constraint propagation on a tracker, see tracker module. Every rule removes the values
+that can't be filled in some cells and they are applied until none of them removes anything.
+
+The rules work on the flat tracker of every chromosome cell and, for the rules about a
+whole unit (row, column or block), on two views of the units:
+    - cell masks: (3 * DIGIT_NUMBER, DIGIT_NUMBER) possible values of each cell of each unit
+    - position masks: (3 * DIGIT_NUMBER, DIGIT_NUMBER) possible cells of each value of each unit,
+        the bit p + 1 of [u, v - 1] is set if the value v can be filled in the p-th cell of unit u
+A hidden subset of values is a naked subset of the position masks, so both views share the subset rule.
+"""
+
+# Combinations of cells of a unit for every subset size, they are built once per grid size
+subsetTables = {}
+
+def getSubsets(digitNumber, size):
+    """
+    Returns the (C, size) table of every combination of "size" cells of a unit, and the
+    (C, digitNumber) table that is True for the cells of each combination.
+    """
+    if (digitNumber, size) not in subsetTables:
+        subsets = npArray(list(combinations(range(digitNumber), size)))
+        members = zeros((len(subsets), digitNumber), dtype=bool)
+        members[arange(len(subsets)).reshape(-1, 1), subsets] = True
+        subsetTables[(digitNumber, size)] = (subsets, members)
+
+    return subsetTables[(digitNumber, size)]
+
+def positionMasks(unitMasks, digitNumber):
+    """
+    Returns the position masks of units from their cell masks.
+    """
+    values = arange(1, digitNumber + 1)
+    # bits[u, p, v - 1] is set if the value v can be filled in the p-th cell of unit u
+    bits = (unitMasks.reshape(unitMasks.shape + (1,)) >> values) & 1
+    positions = (1 << arange(1, digitNumber + 1)).astype(unitMasks.dtype).reshape(1, -1, 1)
+
+    return bitwise_or.reduce(bits * positions, axis=1).astype(unitMasks.dtype)
+
+def cellMasks(unitPositions, digitNumber):
+    """
+    Returns the cell masks of units from their position masks.
+    """
+    # Same transposition as positionMasks, the positions and the values swap their roles
+    return positionMasks(unitPositions, digitNumber)
+
+def subsetEliminations(unitMasks, digitNumber, size):
+    """
+    Returns the values to remove from the cells of units because of the naked subsets of "size" cells:
+    when "size" cells of a unit can only hold "size" values, the other cells can't hold them.
+
+    Parameters:
+        - unitMasks (array): Cell masks of the units, or position masks for hidden subsets
+        - digitNumber (int): Number of digits of the grid
+        - size (int): Number of cells of the subsets
+
+    Return:
+        Array of the shape of unitMasks with the bits to remove
+    """
+    subsets, members = getSubsets(digitNumber, size)
+    subsetMasks = unitMasks[:, subsets]
+    union = bitwise_or.reduce(subsetMasks, axis=2)
+    # Cells that are already fixed don't make a subset
+    found = (countBits(union, digitNumber) == size) & (countBits(subsetMasks, digitNumber) > 1).all(axis=2)
+    eliminations = where((found.reshape(found.shape + (1,)) & ~members), union.reshape(union.shape + (1,)), 0)
+
+    return bitwise_or.reduce(eliminations, axis=1).astype(unitMasks.dtype)
+
+def removeFromUnits(masks, unitIndexes, removed):
+    """
+    Removes bits of unit cell masks from the flat tracker, a cell belongs to several units.
+    """
+    cellRemoved = zeros(masks.shape, dtype=masks.dtype)
+    bitwise_or.at(cellRemoved, unitIndexes.ravel(), removed.ravel())
+    masks &= ~cellRemoved
+
+def nakedSingles(masks, geometry):
+    """
+    The value of a fixed cell is removed from its peers.
+    """
+    singles = isSingle(masks)
+    peers = peerMasks(where(singles, masks, 0).astype(masks.dtype), geometry.peerIndexes)
+    masks[~singles] &= ~peers[~singles]
+
+def hiddenSingles(masks, geometry):
+    """
+    A value that can only be filled in one cell of a unit is fixed in that cell.
+    """
+    digitNumber = geometry.digitNumber
+    unitIndexes = geometry.unitIndexes
+    hidden = positionMasks(masks[unitIndexes], digitNumber)
+    hidden = where(isSingle(hidden), hidden, 0)
+    # Back to the cells, a cell that is the only place of two values of its units can't be solved
+    fixedMasks = cellMasks(hidden, digitNumber)
+    cellFixed = zeros(masks.shape, dtype=masks.dtype)
+    bitwise_or.at(cellFixed, unitIndexes.ravel(), fixedMasks.ravel())
+    fixed = cellFixed != 0
+    masks[fixed] &= where(isSingle(cellFixed[fixed]), cellFixed[fixed], 0).astype(masks.dtype)
+
+def lockedCandidates(masks, geometry):
+    """
+    When the cells of a block that can hold a value are all in one row (or column), the rest of
+    that row can't hold it (pointing). When the cells of a row (or column) that can hold a value
+    are all in one block, the rest of that block can't hold it (claiming).
+    """
+    crossings = bitwise_or.reduce(masks[geometry.crossingIndexes], axis=1)
+    blockRests = bitwise_or.reduce(masks[geometry.blockRestIndexes], axis=1)
+    lineRests = bitwise_or.reduce(masks[geometry.lineRestIndexes], axis=1)
+    pointing = crossings & ~blockRests
+    claiming = crossings & ~lineRests
+
+    removed = zeros(masks.shape, dtype=masks.dtype)
+    bitwise_or.at(removed, geometry.lineRestIndexes.ravel(), repeat(pointing, geometry.lineRestIndexes.shape[1]))
+    bitwise_or.at(removed, geometry.blockRestIndexes.ravel(), repeat(claiming, geometry.blockRestIndexes.shape[1]))
+    masks &= ~removed
+
+def nakedSubsets(size):
+    """
+    Returns the rule of the naked subsets of "size" cells, see subsetEliminations.
+    """
+    def rule(masks, geometry):
+        unitMasks = masks[geometry.unitIndexes]
+        removeFromUnits(masks, geometry.unitIndexes, subsetEliminations(unitMasks, geometry.digitNumber, size))
+    return rule
+
+def hiddenSubsets(size):
+    """
+    Returns the rule of the hidden subsets of "size" values: when "size" values of a unit can
+    only be filled in "size" cells, these cells can't hold other values.
+    """
+    def rule(masks, geometry):
+        digitNumber = geometry.digitNumber
+        positions = positionMasks(masks[geometry.unitIndexes], digitNumber)
+        eliminations = subsetEliminations(positions, digitNumber, size)
+        removeFromUnits(masks, geometry.unitIndexes, cellMasks(eliminations, digitNumber))
+    return rule
+
+# Rules from the cheapest to the most expensive, propagate goes back to the first one after any progress
+RULES = [
+    ("nakedSingle", nakedSingles),
+    ("hiddenSingle", hiddenSingles),
+    ("lockedCandidates", lockedCandidates),
+    ("nakedPair", nakedSubsets(2)),
+    ("hiddenPair", hiddenSubsets(2)),
+    ("nakedTriple", nakedSubsets(3)),
+    ("hiddenTriple", hiddenSubsets(3)),
+]
+
+def isConsistent(masks, geometry):
+    """
+    Returns False if the tracker shows that the puzzle can't be solved: a cell without possible
+    value, two fixed peers with the same value or a value that can't be filled anywhere in a unit.
+    """
+    if (masks == 0).any():
+        return False
+    singles = isSingle(masks)
+    fixedMasks = where(singles, masks, 0).astype(masks.dtype)
+    if ((fixedMasks & peerMasks(fixedMasks, geometry.peerIndexes)) != 0).any():
+        return False
+
+    return (bitwise_or.reduce(masks[geometry.unitIndexes], axis=1) == fullMask(geometry.digitNumber)).all()
+
+def propagate(tracker, rules=RULES):
+    """
+    Applies the rules to the tracker until none of them removes a value.
+
+    Parameters:
+        - tracker (array): Tracker of the puzzle, updated in place
+        - rules (list) (optional=RULES): (name, rule) of the rules to apply, a rule removes values
+            from a flat tracker in place
+
+    Return:
+        Tuple of False if the puzzle can't be solved else True, and the dictionary of the number
+        of values removed by each rule that fired
+    """
+    geometry = getGeometry(tracker.shape[-1])
+    masks = tracker.reshape(-1)
+    fired = {}
+
+    progress = True
+    while progress:
+        progress = False
+        for name, rule in rules:
+            before = masks.copy()
+            rule(masks, geometry)
+            removed = int(countBits(before & ~masks, geometry.digitNumber).sum())
+            if removed:
+                fired[name] = fired.get(name, 0) + removed
+                if not isConsistent(masks, geometry):
+                    return False, fired
+                progress = True
+                break
+
+    return isConsistent(masks, geometry), fired
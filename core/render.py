@@ -0,0 +1,21 @@
+from threading import Lock
+
+class LatestQueue:
+    """
+    A queue holding at most one item where a new item replaces the waiting one, so the reader
+    only sees the latest item and the writer never blocks nor piles up work for the reader.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.item = None
+
+    def put(self, item):
+        """ Publish an item, the waiting one is dropped. """
+        with self.lock:
+            self.item = item
+
+    def get(self):
+        """ Take the waiting item, None if there is none. """
+        with self.lock:
+            item, self.item = self.item, None
+        return item
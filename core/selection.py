@@ -1,9 +1,22 @@
-import random
+from numpy import arange, argpartition, argsort, cumsum, take_along_axis
 from .settings import SELECTION_CHOICE, SelectionOption
 
+def topIndexes(fitness, number):
+    """
+    Returns the indexes of the "number" highest fitness values, in no particular order.
+    The fitness array is partitioned instead of sorted, so it runs in linear time.
+    """
+    number = min(number, len(fitness))
+    if number <= 0:
+        return arange(0)
+
+    return argpartition(-fitness, number - 1)[:number]
+
 class Selection:
-    def __init__(self):
-        self.call = self.getChoice()
+    """ Selection operators pick parents straight from the fitness array of the population,
+    which doesn't need to be sorted. They draw all their random numbers from a numpy Generator. """
+    def __init__(self, option=SELECTION_CHOICE):
+        self.call = self.getChoice(option)
 
     def getChoice(self, option=SELECTION_CHOICE):
         if option == SelectionOption.RANKING:
@@ -13,58 +26,63 @@ class Selection:
         elif option == SelectionOption.TOP:
             return self.topSelect
 
-    def rankingSelect(self, candidates, number):
+    def rankingSelect(self, fitness, number, rng):
         """ Select a number of candidates from given candidates list.
         Fitness level is used to associate a probability of selection with each candidate.
-        
+
         Parameters:
-            - candidates (list): given candidates list to select
+            - fitness (array): fitness of the candidates to select
             - number (int): number of candidates to select
+            - rng (Generator): Random number generator
+
+        Return:
+            Array of the selected candidates' indexes
         """
-        fitnessWeight = [c.fitness for c in candidates]
-        selectedCandidates = random.choices(candidates, weights=fitnessWeight, k=number)
+        # Draw all the candidates at once from the cumulative weights
+        cumWeights = cumsum(fitness)
+        selectedCandidates = cumWeights.searchsorted(rng.random(number) * cumWeights[-1], side="right")
 
-        return selectedCandidates
+        return selectedCandidates.clip(0, len(fitness) - 1)
 
-    def tournamentSelect(self, candidates, number, size=2, selectionRate=0.8):
+    def tournamentSelect(self, fitness, number, rng, size=2, selectionRate=0.8):
         """ Select a number of candidates from given candidates list.
         Involves running several "tournaments" among a few individuals (or chromosomes) chosen at random from the population.
-        
+
         Parameters:
-            - candidates (list): given candidates list to select
+            - fitness (array): fitness of the candidates to select
             - number (int): number of candidates to select
+            - rng (Generator): Random number generator
+
+        Return:
+            Array of the selected candidates' indexes
         """
         self.size = size
         self.selectionRate = selectionRate
-        def compete(competitors):
-            competitors.sort(key=lambda x: -x.fitness)
-            q = 1 - self.selectionRate
-            cumRate = q
-
-            r = random.random()
-            for i in range(0, len(competitors) - 1):
-                if r < 1 - cumRate:
-                    return competitors[i]
-                else:
-                    cumRate = cumRate * q
-            return competitors[-1]
-        selectedCandidates = []
-        for _ in range(0, number):
-            competitors = random.choices(candidates, k=self.size)
-            selectedCandidates.append(compete(competitors))
-
-        return selectedCandidates
-
-    def topSelect(self, candidates, number, selectionRate=0.2):
+
+        # Run every tournament at once, the competitors of each one are ranked by fitness
+        competitors = rng.integers(0, len(fitness), (number, self.size))
+        ranks = argsort(-fitness[competitors], axis=1, kind="stable")
+        competitors = take_along_axis(competitors, ranks, axis=1)
+
+        # The i-th competitor wins if the first ones lost, the best one wins with the selection rate
+        q = 1 - self.selectionRate
+        thresholds = 1 - q ** arange(1, self.size)
+        winners = (rng.random((number, 1)) >= thresholds).sum(axis=1)
+
+        return competitors[arange(number), winners]
+
+    def topSelect(self, fitness, number, rng, selectionRate=0.2):
         """ Randomly select a number of candidates from top portion of given candidates list.
-        
+
         Parameters:
-            - candidates (list): given candidates list to select
+            - fitness (array): fitness of the candidates to select
             - number (int): number of candidates to select
+            - rng (Generator): Random number generator
+
+        Return:
+            Array of the selected candidates' indexes
         """
         self.selectionRate = selectionRate
-        topIndex = int(self.selectionRate * len(candidates))
-
-        return random.choices(candidates[:topIndex], k=number)
+        topCandidates = topIndexes(fitness, int(self.selectionRate * len(fitness)))
 
-selection = Selection()
\ No newline at end of file
+        return topCandidates[rng.integers(0, len(topCandidates), number)]
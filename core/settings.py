@@ -1,15 +1,29 @@
 from math import sqrt
 
 """ Genetic Algorithm Settings """
-DIGIT_NUMBER = 9  # Number of digits (Standard Sudoku is 9).
+DIGIT_NUMBER = 9  # Number of digits of an empty grid (Standard Sudoku is 9), a puzzle brings its own size.
 BLOCK_NUMBER = int(sqrt(DIGIT_NUMBER)) # Number of digits on 1 row per box.
+DIGIT_SYMBOLS = "0123456789ABCDEFGHIJKLMNOP" # Symbol of each value in puzzle strings and on the board, up to 25 digits.
 POPULATION_SIZE = 1000  # Number of candidates (i.e. population size).
 ELITE_NUMBER = 0  # Number of elites (Elites will alive after generation).
 MAX_GENERATION = 2000  # Number of generations.
 MUTATION_RATE = 0.8
 CROSSOVER_RATE = 1
 MAX_STALE_COUNT = 30
-GOAL = DIGIT_NUMBER*DIGIT_NUMBER*2
+ISLAND_NUMBER = 4  # Number of islands (Populations evolving in parallel processes), they share the POPULATION_SIZE candidates.
+MIGRATION_INTERVAL = 10  # Number of generations between two migrations.
+MIGRANT_RATE = 0.05  # Fraction of the candidates of an island sent to another island at each migration, its top ones.
+LOCAL_SEARCH_INTERVAL = 0  # Number of generations between two local searches, 0 disables them.
+LOCAL_SEARCH_FRACTION = 0.05  # Fraction of the fittest candidates improved by the local search.
+LOCAL_SEARCH_DEPTH = 3  # Maximum number of improving swaps per candidate and local search.
+LOCAL_SEARCH_SWAPS = 324  # Maximum number of swaps scored per candidate and step by the local and tabu searches (all of a 9 x 9 grid).
+TRAJECTORY_CHAINS = 32  # Number of chains of the annealing and tabu search solvers.
+TRAJECTORY_STEPS = 100  # Number of moves of every chain per generation of the annealing and tabu search solvers.
+REFINEMENT_STEPS = 500  # Number of moves refining the elites of a stale population, see STALE_CHOICE.
+ANNEALING_COOLING = 0.9995  # Factor of the temperature of the annealing after every move.
+TABU_TENURE = 10  # Number of moves a chain can't take a swap again after taking it.
+ADAPTATION_RATE = 0.1  # Learning rate of the operator weights of the random crossover and mutations, 0 keeps them fixed.
+ADAPTATION_MIN_PROBABILITY = 0.01  # Lowest probability of an operator chosen by adaptive operator selection, capped by its initial weight.
 # Algorithm Option
 class FitnessOption:
     DIFFERENT = 0
@@ -32,16 +46,28 @@ class CrossoverOption:
     UNIFORM = 4
     CHOICE = 5
     HALF = 6
+class TopologyOption:
+    RING = 0
+    RANDOM = 1
+class SolverOption:
+    GENETIC = 0 # genetic algorithm only
+    EXACT = 1 # exact search only, see exact module
+    FALLBACK = 2 # genetic algorithm, then exact search if it finds no solution
+    ANNEALING = 3 # simulated annealing, see trajectory module
+    TABU = 4 # tabu search, see trajectory module
 # Choose Algorithm Option
 FITNESS_CHOICE = FitnessOption.PERFECT
 MUTATION_CHOICE = MutationOption.MULTI_SWAP
 SELECTION_CHOICE = SelectionOption.TOP
 CROSSOVER_CHOICE = CrossoverOption.HALF
+TOPOLOGY_CHOICE = TopologyOption.RING
+SOLVER_CHOICE = SolverOption.GENETIC
+STALE_CHOICE = SolverOption.GENETIC # ANNEALING or TABU refine the elites of a stale population
 
 """ UI Setting """
+RENDER_RATE = 10  # Number of board refreshes per second while solving.
 BOARD_SIZE = 600
-DIGIT_SIZE = 36
-DIGIT_SPACE = int((BOARD_SIZE/DIGIT_NUMBER)/2)
+DIGIT_SIZE = 36 # Font size of the digits of a 9 x 9 board, it shrinks with the size of the grid.
 TEXT_SIZE = 18
 FONT_FAMILY = "*"
 LINE_COLOR = "gray"
@@ -59,6 +85,13 @@ class RenderOption:
     NOT_FOUND = 2
     ONLY_TEXT = 3
     RELOADED = 4
+class EventOption:
+    INITIALIZING = 0
+    GENERATION = 1
+    RESTART = 2
+    FOUND = 3
+    NOT_FOUND = 4
+    UNSOLVABLE = 5
 class OpenButtonOption:
     OPEN = 0
     CLOSE = 1
@@ -1,148 +1,379 @@
+from math import inf
+from time import perf_counter
+from numpy import concatenate as npConcatenate
+from numpy.random import default_rng
+
 from .population import Population
-from .given import given
-from .settings import POPULATION_SIZE, MAX_GENERATION, RenderOption
-from .settings import DIGIT_NUMBER, MAX_STALE_COUNT, GOAL
-from .helper import encodePuzzle, copyGrid, sameRowIndexes, sameColumnIndexes, sameBlockIndexes
+from .fitness import maxFitness
+from .context import Context
+from .settings import MAX_GENERATION, EventOption, RenderOption, SolverOption, SOLVER_CHOICE
+from .settings import LOCAL_SEARCH_INTERVAL, RENDER_RATE
+from .settings import TRAJECTORY_CHAINS, TRAJECTORY_STEPS, REFINEMENT_STEPS, STALE_CHOICE
+from .helper import encodePuzzle
+from .tracker import newTracker, valueMasks, isSingle, maskValues
+from .propagation import RULES, propagate
+from .exact import countSolutions, solveExact
+from .trajectory import newEngine
+from .timer import PhaseTimer
+from .event import Event
 
 class Sudoku:
-    def __init__(self, render):
-        self.render = render # render the ui when change
+    def __init__(self, render=None, verbose=True, seed=None, solver=SOLVER_CHOICE, staleSolver=STALE_CHOICE,
+            context=None):
+        # Given grid, genetic operators and parameters of the solver, a new one with the settings if it's not given
+        self.context = Context() if context is None else context
+        self.render = render # render the ui when change, solve doesn't format any text if it is None
+        self.verbose = verbose # print the progress to stdout when it is True
         self.reinitializationCount = 0 # count the reinitialization
+        self.generationCount = 0 # count the generations of the last solve
         self.exitFlag = False # cancel solving when it is True
-        self.encodedGiven = encodePuzzle(given.values)
+        self.encodedGiven = encodePuzzle(self.context.given.values)
+        self.goal = maxFitness(len(self.encodedGiven)) # fitness of a solution, it depends on the grid size
         self.trackGrid = None
-        self.population = Population()
+        self.propagation = {} # number of values removed by each propagation rule, see fillPredetermined
+        # Random number generator of the solver, seed may be an int, a SeedSequence or None for a fresh one
+        self.rng = default_rng(seed)
+        # Time spent in each phase of the generations of the last solve, see getStats
+        self.timer = PhaseTimer()
+        self.population = Population(self.rng, self.timer, self.context)
+        self.solver = solver # genetic algorithm, exact search or both, see SolverOption
+        self.staleSolver = staleSolver # annealing or tabu search refining the elites of a stale population
+        self.engine = None # annealing or tabu search moving the candidates when it is the solver
+        self.localSearchInterval = LOCAL_SEARCH_INTERVAL # generations between two local searches, 0 disables them
 
-    def fillPredetermined(self):
+    def fillPredetermined(self, rules=RULES):
         """
-        Fills some predetermined cells of the Sudoku grid using a pencil marking method.
+        Fills the predetermined cells of the Sudoku grid using constraint propagation.
+        The possible values of every cell are tracked as bitmasks, see tracker module, and the rules
+        of the propagation module remove values until none of them fires. The number of values
+        removed by each rule is kept in the propagation attribute.
+
+        Parameters:
+            - rules (list) (optional=RULES): Rules to apply, see propagation module
+
+        Return:
+            False if the puzzle is found unsolvable, else True
         """
-        self.trackGrid = copyGrid(self.encodedGiven, lambda i, j: set(range(1, DIGIT_NUMBER + 1)))
+        digitNumber = len(self.encodedGiven)
+        self.trackGrid = newTracker(digitNumber)
+        trackCells = self.trackGrid.reshape(-1)
+        givenCells = self.encodedGiven.reshape(-1)
+        fixed = givenCells != 0
+        trackCells[fixed] = valueMasks(givenCells[fixed], digitNumber)
 
-        def pencilMark(i, j):
-            """
-            Marks the value of grid[i][j] element in it's row, column and block.
+        solvable, self.propagation = propagate(self.trackGrid, rules)
+        if not solvable:
+            return False
 
-            Parameters:
-                - i (int): Block's index.
-                - j (int): Block's element index.
+        # Fill every cell that only have one possible value
+        singles = isSingle(trackCells)
+        givenCells[singles] = maskValues(trackCells[singles])
+        return True
 
-            Returns: The more completed version of the grid.
-            """
-            # remove from same block cells
-            for a, b in sameBlockIndexes(i, j, itself=False):
-                self.trackGrid[a][b].discard(self.encodedGiven[i][j])
+    def solveExact(self):
+        """
+        Searches a solution of the propagated puzzle exhaustively, see exact module. The solution is
+        loaded as the only candidate of the population so the events and the best candidate show it.
 
-            # remove from same row cells
-            for a, b in sameRowIndexes(i, j, itself=False):
-                self.trackGrid[a][b].discard(self.encodedGiven[i][j])
+        Return:
+            True if a solution is found, else False
+        """
+        solution = solveExact(self.trackGrid.copy())
+        self.timer.lap("exact")
+        if solution is None:
+            return False
 
-            # remove from same column cells
-            for a, b in sameColumnIndexes(i, j, itself=False):
-                self.trackGrid[a][b].discard(self.encodedGiven[i][j])
+        self.population.loadGenes(solution.reshape((1,) + solution.shape), self.trackGrid)
+        return True
 
-        for i in range(DIGIT_NUMBER):
-            for j in range(DIGIT_NUMBER):
-                if self.encodedGiven[i][j] != 0:
-                    pencilMark(i, j)
+    def countSolutions(self, limit=2):
+        """
+        Returns the number of solutions of the puzzle, counting stops at "limit".
+        The default limit tells whether the solution is unique.
+        """
+        if self.trackGrid is None and not self.fillPredetermined():
+            return 0
 
-        while True:
-            anythingChanged = False
+        return countSolutions(self.trackGrid.copy(), limit)
 
-            for i in range(DIGIT_NUMBER):
-                for j in range(DIGIT_NUMBER):
-                    if self.encodedGiven[i][j] != 0:
-                        continue
+    def refine(self, genes):
+        """
+        Moves candidates with the annealing or tabu search of staleSolver, see trajectory module.
+        It gives the elites of a stale population a cheap way out of their local optimum.
 
-                    elif len(self.trackGrid[i][j]) == 0:
-                        renderTxt = 'The puzzle is unsolvable'
-                        self.render(renderTxt, RenderOption.NOT_FOUND)
-                        return False
-                    elif len(self.trackGrid[i][j]) == 1:
-                        self.encodedGiven[i][j] = list(self.trackGrid[i][j])[0]
-                        pencilMark(i, j)
+        Parameters:
+            - genes (array): (N, DIGIT_NUMBER, DIGIT_NUMBER) chromosomes to refine
 
-                        anythingChanged = True
+        Return:
+            The population of the best state every candidate has reached
+        """
+        chains = Population(self.rng, self.timer, self.context)
+        chains.loadGenes(genes, self.trackGrid)
+        engine = newEngine(self.staleSolver, chains, self.encodedGiven)
+        engine.run(REFINEMENT_STEPS)
+        chains.loadGenes(engine.bestGenes, self.trackGrid)
+        self.timer.lap("trajectory")
+        return chains
 
-            if not anythingChanged:
-                return True
+    def getStats(self):
+        """
+        Returns the time spent in each phase of the generations of the current or last solve.
 
-    def solve(self):
+        Return:
+            Dictionary of the number of timed generations, the elapsed time, the generations per second and
+            the total, mean and last time in seconds of every phase: initialization, best, report (time
+            spent by the consumer of the events), selection, crossover, evaluation, mutation, localSearch,
+            evolve (rest of evolve), restart, exact and trajectory (annealing or tabu search)
+        """
+        return self.timer.getStats()
+
+    def evolve(self, generation):
+        """
+        Replaces the population by its next generation, whose fittest candidates are improved by a
+        local search every localSearchInterval generations. With the annealing or tabu search solver,
+        every candidate moves TRAJECTORY_STEPS times instead.
+
+        Parameters:
+            - generation (int): Index of the current generation
+        """
+        if self.engine is not None:
+            self.engine.run(TRAJECTORY_STEPS)
+            self.timer.lap("trajectory")
+            return
+
+        self.population.nextGen(self.encodedGiven, self.trackGrid)
+        if self.localSearchInterval and (generation + 1) % self.localSearchInterval == 0:
+            self.population.localSearch(self.encodedGiven)
+
+    def event(self, option, generation, start, snapshot=False):
         """
-        Solves a given Sudoku puzzle using a genetic algorithm.
+        Returns an event of the current state of the population, see Event.
         """
+        population = self.population
+        gene = population.genes[population.bestIndex].copy() if snapshot else None
+        return Event(option, generation, population.bestFitness, population.worstFitness,
+            self.reinitializationCount, perf_counter() - start, gene)
+
+    def iterate(self, snapshotInterval=1):
+        """
+        Solves a given Sudoku puzzle using a genetic algorithm, step by step. The solver attribute may
+        replace it by an exact search, or run the exact search after the genetic algorithm failed.
+        The progress is yielded as events and nothing is printed nor rendered, so the consumer only pays
+        for what it uses. Closing the iterator, e.g. leaving a for loop, cancels the solving.
+
+        Parameters:
+            - snapshotInterval (int) (optional=1): Generation events carry a copy of the best gene every
+                "snapshotInterval" generations, never if it is 0. FOUND and NOT_FOUND events always do.
+
+        Return:
+            Iterator of Event: INITIALIZING, then one GENERATION per generation with a RESTART before
+            each reinitialization, and FOUND or NOT_FOUND at the end, or a single UNSOLVABLE
+        """
+        start = perf_counter()
         self.exitFlag = False
+        self.generationCount = 0
+        self.reinitializationCount = 0
 
         # Fill all predetermined value for the puzzle
-        self.fillPredetermined()
-        print(*self.encodedGiven, sep="\n")
-        renderTxt = "Initializing..."
-        self.render(renderTxt, RenderOption.ONLY_TEXT)
+        if not self.fillPredetermined():
+            yield Event(EventOption.UNSOLVABLE, elapsed=perf_counter() - start)
+            return
+        yield Event(EventOption.INITIALIZING, elapsed=perf_counter() - start)
 
         # Generate initial candidates
-        self.population.initializeCandidates(POPULATION_SIZE, self.encodedGiven, self.trackGrid)
+        self.timer.reset()
+        if self.solver == SolverOption.EXACT:
+            found = self.solveExact()
+            yield self.event(EventOption.FOUND if found else EventOption.NOT_FOUND, 0, start, found)
+            return
+        if self.solver in (SolverOption.ANNEALING, SolverOption.TABU):
+            yield from self.iterateChains(start, snapshotInterval)
+            return
+        self.engine = None
+        populationSize = self.context.populationSize
+        self.population.initializeCandidates(populationSize, self.encodedGiven, self.trackGrid)
+        self.timer.lap("initialization")
         prevBestFitness = 0
         stale = 0
         cumElites = []
-        self.reinitializationCount = 0
 
         # For up to 2000 generations...
         for i in range(MAX_GENERATION):
             if self.exitFlag:
                 return
 
-            # Update the best candidate for each generation
-            given.bestCandidate = self.population.candidates[0]
-            prevBestFitness = self.population.candidates[0].fitness
-
-            if i % 1 == 0:
-                print("Generation %d" % i)
-                print("Best score: %d" % prevBestFitness)
-                print("Worst score: %d" % self.population.candidates[-1].fitness)
-
-            renderTxt = "Generation %d\n" % i
-            renderTxt += "Best fitness: %d\n" % prevBestFitness
-            renderTxt += "Worst fitness: %d\n" % self.population.candidates[-1].fitness
-            renderTxt += "Reinitialization count: %d\n" % self.reinitializationCount
+            self.generationCount = i
+            prevBestFitness = self.population.bestFitness
 
             # Check for a solution
-            if prevBestFitness == GOAL:
-                renderTxt = "Solution found at generation %d!" % i
-                self.render(renderTxt, RenderOption.FOUNDED)
+            if prevBestFitness == self.goal:
+                yield self.event(EventOption.FOUND, i, start, True)
                 return
-            else:
-                self.render(renderTxt)
+            snapshot = snapshotInterval > 0 and i % snapshotInterval == 0
+            event = self.event(EventOption.GENERATION, i, start, snapshot)
+            self.timer.lap("best")
+            yield event
+            self.timer.lap("report")
 
-            # Go to next generation if the current population doesn't have solution
-            self.population.nextGen(self.encodedGiven, self.trackGrid)
+            # Go to next generation if the current population doesn't have solution, the phases
+            # of the next generation process are timed by the population and the rest of evolve here
+            self.evolve(i)
+            self.timer.lap("evolve")
+            self.timer.generations += 1
 
             # Check for stale population
-            if self.population.candidates[0].fitness != prevBestFitness:
+            if self.population.bestFitness != prevBestFitness:
                 stale = 0
             else:
                 stale += 1
 
-            # Re-seed the population if 30 generations have passed with the fittest value not improving.
-            if stale > MAX_STALE_COUNT:
-                # print("The population has gone stale. Searching in local space...")
-                # self.population.localSearch(3, self.given, self.track_grid)
+            # Re-seed the population if maxStaleCount generations have passed with the fittest value not improving.
+            if stale > self.context.maxStaleCount:
                 self.reinitializationCount += 1
-                renderTxt = "The population has gone stale. Reinitializing..."
-                self.render(renderTxt, RenderOption.ONLY_TEXT)
-                
+                yield self.event(EventOption.RESTART, i, start)
+                self.timer.lap("report")
+
                 # Store the top few solutions (candiddates) from each stale population
                 # When enough top solutions accumulate, a new population is created from these best solutions
                 # and used as an initial population when the GA is restarted.
-                if len(cumElites) < POPULATION_SIZE:
-                    numElite = int(POPULATION_SIZE * 0.1)
-                    cumElites.extend(self.population.candidates[:numElite])
-                    self.population.initializeCandidates(POPULATION_SIZE, self.encodedGiven, self.trackGrid)
+                if sum(map(len, cumElites)) < populationSize:
+                    numElite = int(populationSize * 0.1)
+                    elites = self.population.genes[self.population.topIndexes(numElite)]
+                    refined = None
+                    if self.staleSolver in (SolverOption.ANNEALING, SolverOption.TABU):
+                        refined = self.refine(elites)
+                        elites = refined.genes
+                    if refined is not None and refined.bestFitness == self.goal:
+                        # The solution is found by the check of the next generation
+                        self.population.loadGenes(elites, self.trackGrid)
+                    else:
+                        cumElites.append(elites)
+                        self.population.initializeCandidates(populationSize, self.encodedGiven, self.trackGrid)
                 else:
-                    print("Activate cumulative method")
-                    self.population.candidates = cumElites
+                    self.population.loadGenes(npConcatenate(cumElites), self.trackGrid)
                     cumElites = []
                 stale = 0
-        
-        renderTxt = "No solution found."
-        self.render(renderTxt, RenderOption.NOT_FOUND)
-        return None
+                self.timer.lap("restart")
+
+        self.generationCount = MAX_GENERATION
+        # Last stage: the exact search settles the puzzle the genetic algorithm couldn't solve
+        if self.solver == SolverOption.FALLBACK and self.solveExact():
+            yield self.event(EventOption.FOUND, MAX_GENERATION, start, True)
+            return
+        yield self.event(EventOption.NOT_FOUND, MAX_GENERATION, start, True)
+
+    def iterateChains(self, start, snapshotInterval):
+        """
+        Solves the puzzle with the annealing or tabu search of the solver attribute, see iterate.
+        The population holds TRAJECTORY_CHAINS independent chains and a generation is TRAJECTORY_STEPS
+        moves of every chain. Chains are reinitialized when their best fitness has not improved for
+        maxStaleCount generations, see Context.
+        """
+        self.population.initializeCandidates(TRAJECTORY_CHAINS, self.encodedGiven, self.trackGrid)
+        self.engine = newEngine(self.solver, self.population, self.encodedGiven)
+        self.timer.lap("initialization")
+        bestFitness = self.population.bestFitness
+        stale = 0
+
+        for i in range(MAX_GENERATION):
+            if self.exitFlag:
+                return
+
+            self.generationCount = i
+            if self.population.bestFitness == self.goal:
+                yield self.event(EventOption.FOUND, i, start, True)
+                return
+            snapshot = snapshotInterval > 0 and i % snapshotInterval == 0
+            event = self.event(EventOption.GENERATION, i, start, snapshot)
+            self.timer.lap("best")
+            yield event
+            self.timer.lap("report")
+
+            self.evolve(i)
+            self.timer.lap("evolve")
+            self.timer.generations += 1
+
+            # The fitness of a chain goes down as well as up, only a new best fitness is a progress
+            if self.population.bestFitness > bestFitness:
+                bestFitness = self.population.bestFitness
+                stale = 0
+            else:
+                stale += 1
+
+            if stale > self.context.maxStaleCount:
+                self.reinitializationCount += 1
+                yield self.event(EventOption.RESTART, i, start)
+                self.timer.lap("report")
+                self.population.initializeCandidates(TRAJECTORY_CHAINS, self.encodedGiven, self.trackGrid)
+                self.engine.reset()
+                bestFitness = self.population.bestFitness
+                stale = 0
+                self.timer.lap("restart")
+
+        self.generationCount = MAX_GENERATION
+        yield self.event(EventOption.NOT_FOUND, MAX_GENERATION, start, True)
+
+    def solve(self):
+        """
+        Solves a given Sudoku puzzle using a genetic algorithm, the progress is rendered and printed
+        if verbose is set. See iterate to follow the progress without a render function.
+
+        Return:
+            True if a solution is found, it is the best candidate of the given grid of the context, else False
+        """
+        render = self.render
+        # Elapsed time of the last rendered generation, the UI only draws RENDER_RATE times per second
+        # so the status of the generations in between is not built
+        renderedAt = -inf
+        # The best candidate is only needed by the render function until the last event
+        for event in self.iterate(snapshotInterval=0):
+            if event.option == EventOption.UNSOLVABLE:
+                if render:
+                    render("The puzzle is unsolvable", RenderOption.NOT_FOUND)
+                return False
+            if event.option == EventOption.INITIALIZING:
+                if self.verbose:
+                    print("Propagation: %s" % self.propagation)
+                    print(*self.encodedGiven, sep="\n")
+                if render:
+                    render("Initializing...", RenderOption.ONLY_TEXT)
+                continue
+
+            # The population is empty when the exact search alone found no solution
+            if event.option in (EventOption.FOUND, EventOption.NOT_FOUND) and len(self.population.genes):
+                self.context.given.bestCandidate = self.population.getCandidate()
+
+            if event.option == EventOption.GENERATION:
+                if self.verbose:
+                    print("Generation %d" % event.generation)
+                    print("Best score: %d" % event.bestFitness)
+                    print("Worst score: %d" % event.worstFitness)
+                if render and event.elapsed - renderedAt >= 1 / RENDER_RATE:
+                    renderedAt = event.elapsed
+                    self.context.given.bestCandidate = self.population.getCandidate()
+                    renderTxt = "Generation %d\n" % event.generation
+                    renderTxt += "Best fitness: %d\n" % event.bestFitness
+                    renderTxt += "Worst fitness: %d\n" % event.worstFitness
+                    renderTxt += "Reinitialization count: %d\n" % event.restarts
+                    renderTxt += "Speed: %.1f generations/s\n" % self.timer.getStats()["generationsPerSecond"]
+                    renderTxt += "Time per generation (ms): %s\n" % self.timer.summary()
+                    render(renderTxt)
+            elif event.option == EventOption.RESTART:
+                if render:
+                    render("The population has gone stale. Reinitializing...", RenderOption.ONLY_TEXT)
+            elif event.option == EventOption.FOUND:
+                if render:
+                    if self.solver == SolverOption.EXACT:
+                        render("Solution found by exact search!", RenderOption.FOUNDED)
+                    else:
+                        render("Solution found at generation %d!" % event.generation, RenderOption.FOUNDED)
+                return True
+            elif event.option == EventOption.NOT_FOUND:
+                if render:
+                    render("No solution found.", RenderOption.NOT_FOUND)
+                return False
+
+        # Cancelled by the exit flag, the best candidate is the fittest one reached so far
+        if len(self.population.genes):
+            self.context.given.bestCandidate = self.population.getCandidate()
+        return False
@@ -0,0 +1,50 @@
+from time import perf_counter
+
+class PhaseTimer:
+    """ Measures the time spent in each phase of the generation loop.
+
+    The phases of a generation follow each other, so a single clock is kept: every lap
+    charges the time elapsed since the previous lap to a phase. It costs one perf_counter
+    call per phase, which is cheap enough to be always on. """
+    def __init__(self):
+        self.totals = {} # time spent in each phase since the last reset
+        self.lasts = {} # time spent in each phase during the last generation
+        self.generations = 0 # number of timed generations since the last reset
+        self.startTime = perf_counter()
+        self.lastTime = self.startTime
+
+    def reset(self):
+        """ Forget every measure and restart the clock. """
+        self.totals = {}
+        self.lasts = {}
+        self.generations = 0
+        self.startTime = perf_counter()
+        self.lastTime = self.startTime
+
+    def lap(self, phase):
+        """ Charge the time elapsed since the previous lap to a phase. """
+        now = perf_counter()
+        elapsed = now - self.lastTime
+        self.totals[phase] = self.totals.get(phase, 0) + elapsed
+        self.lasts[phase] = elapsed
+        self.lastTime = now
+
+    def getStats(self):
+        """
+        Returns the measures as a dictionary with the number of generations, the elapsed time until
+        the last lap, the generations per second and the total, mean and last time of every phase in seconds.
+        """
+        elapsed = self.lastTime - self.startTime
+        generations = max(self.generations, 1)
+        return {
+            "generations": self.generations,
+            "elapsed": elapsed,
+            "generationsPerSecond": self.generations / elapsed if elapsed > 0 else 0,
+            "phases": {phase: {"total": total, "mean": total / generations, "last": self.lasts[phase]}
+                for phase, total in self.totals.items()},
+        }
+
+    def summary(self):
+        """ Returns a short text of the mean time per generation of every phase in milliseconds. """
+        generations = max(self.generations, 1)
+        return ", ".join("%s %.2f" % (phase, 1000 * total / generations) for phase, total in self.totals.items())
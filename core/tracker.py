@@ -0,0 +1,72 @@
+from numpy import arange, bitwise_or, full, log2, uint16, uint32, where, zeros
+
+"""
+The tracker stores the possible values of every cell of a chromosome as a bitmask,
+the bit v of a cell is set if the value v can be filled in that cell (bit 0 is never set).
+It is a (DIGIT_NUMBER, DIGIT_NUMBER) array in the chromosome layout, like the genes.
+"""
+
+def maskType(digitNumber):
+    """
+    Returns the smallest unsigned int type that holds the bitmask of a "digitNumber" digits grid.
+    """
+    return uint16 if digitNumber < 16 else uint32
+
+def fullMask(digitNumber):
+    """
+    Returns the bitmask with every value in [1, digitNumber] set.
+    """
+    return ((1 << (digitNumber + 1)) - 2)
+
+def newTracker(digitNumber):
+    """
+    Returns a tracker that allows every value in every cell.
+    """
+    return full((digitNumber, digitNumber), fullMask(digitNumber), dtype=maskType(digitNumber))
+
+def valueMasks(values, digitNumber):
+    """
+    Returns the bitmask of each value of an array, zero values give an empty bitmask.
+    """
+    masks = 1 << values.astype(maskType(digitNumber))
+    return where(values != 0, masks, 0).astype(masks.dtype)
+
+def maskValues(masks):
+    """
+    Returns the value of each single-value bitmask of an array, it must only contain powers of two.
+    """
+    return log2(masks).astype(int)
+
+def isSingle(masks):
+    """
+    Returns True for each bitmask of an array that holds exactly one value.
+    """
+    return (masks != 0) & ((masks & (masks - 1)) == 0)
+
+def countBits(masks, digitNumber):
+    """
+    Returns the number of possible values of each bitmask of an array.
+    """
+    counts = zeros(masks.shape, dtype=int)
+    for value in range(1, digitNumber + 1):
+        counts += (masks >> value) & 1
+
+    return counts
+
+def peerMasks(masks, peerIndexes):
+    """
+    Returns, for every cell, the union of the bitmasks of its peers.
+
+    Parameters:
+        - masks (array): Flat array of one bitmask per chromosome cell
+        - peerIndexes (array): Peers table of the geometry
+    """
+    return bitwise_or.reduce(masks[peerIndexes], axis=1)
+
+def allowedValues(tracker):
+    """
+    Returns a (DIGIT_NUMBER * DIGIT_NUMBER, DIGIT_NUMBER + 1) boolean table from the tracker,
+    the cell at flat chromosome index i can hold the value v if the table is True at [i, v].
+    """
+    digitNumber = tracker.shape[-1]
+    return ((tracker.reshape(-1, 1) >> arange(digitNumber + 1)) & 1).astype(bool)
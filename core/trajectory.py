@@ -0,0 +1,155 @@
+from numpy import arange, exp, full, inf, minimum, tile, where, zeros
+
+from .mutation import freePairs
+from .fitness import maxFitness
+from .settings import ANNEALING_COOLING, LOCAL_SEARCH_SWAPS, TABU_TENURE, SolverOption
+
+"""
+Single-trajectory metaheuristics on the candidates of a population, see Population. Every candidate
+is an independent chain that moves by swapping two unknown cells of a sub-block, so the chains keep
+the encoding of the genetic algorithm: each sub-block holds a permutation of its missing values
+and the given values never move. All the chains make one move at once and their fitness is updated
+incrementally by the swaps, see Population.swapDelta and Population.swapCells.
+
+A chain may leave a solution by a move that lowers its fitness, so a run stops as soon as a chain
+reaches the fitness of a solution, and the best state every chain has reached is kept.
+"""
+
+class Chains:
+    """ Moves shared by the engines: the swaps of two unknown cells of a sub-block and the best
+    state of every chain. """
+    def __init__(self, population, given):
+        self.population = population
+        self.blocks, self.firstCells, self.secondCells = freePairs(given)
+        self.firstPositions = self.blocks * len(given) + self.firstCells
+        self.secondPositions = self.blocks * len(given) + self.secondCells
+        self.goal = maxFitness(len(given))
+        self.resetBest()
+
+    def resetBest(self):
+        """ Takes the current candidates as the best state of every chain. """
+        self.bestGenes = self.population.genes.copy()
+        self.bestFitness = self.population.fitness.copy()
+
+    def keepBest(self):
+        """
+        Keeps the state of the chains that beat their best fitness.
+
+        Return:
+            True if a chain has reached the fitness of a solution, else False
+        """
+        population = self.population
+        improved = population.fitness > self.bestFitness
+        if improved.any():
+            self.bestGenes[improved] = population.genes[improved]
+            self.bestFitness[improved] = population.fitness[improved]
+        return bool(improved.any()) and self.isSolved()
+
+    def isSolved(self):
+        """ Returns True if a chain has reached the fitness of a solution. """
+        return len(self.bestFitness) > 0 and int(self.bestFitness.max()) == self.goal
+
+class Annealing(Chains):
+    """ Simulated annealing: every chain tries a random swap and takes it if it doesn't lower the
+    fitness, or with the probability exp(delta / temperature) if it does. The temperature of each
+    chain starts at the spread of the fitness changes of random swaps and is cooled at every step. """
+    def __init__(self, population, given):
+        super().__init__(population, given)
+        self.cooling = ANNEALING_COOLING
+        self.temperatures = zeros(0)
+        self.reset()
+
+    def randomSwaps(self, number):
+        """ Returns the indexes of a random swap of every chain, "number" times. """
+        return self.population.rng.integers(0, len(self.blocks), (number, len(self.population)))
+
+    def reset(self):
+        """ Heats every chain again, the start temperature is measured on the current candidates. """
+        population = self.population
+        self.resetBest()
+        chainNumber = len(population)
+        if len(self.blocks) == 0 or chainNumber == 0:
+            self.temperatures = full(chainNumber, 1.0)
+            return
+
+        swaps = self.randomSwaps(10).ravel()
+        chains = tile(arange(chainNumber), 10)
+        delta, _ = population.swapDelta(chains, self.firstPositions[swaps], self.secondPositions[swaps])
+        self.temperatures = full(chainNumber, max(float(delta.std()), 0.5))
+
+    def run(self, steps):
+        """ Moves every chain "steps" times, or until a chain reaches the fitness of a solution. """
+        population = self.population
+        if len(self.blocks) == 0 or self.isSolved():
+            return
+        chains = arange(len(population))
+        for swaps in self.randomSwaps(steps):
+            delta, _ = population.swapDelta(chains, self.firstPositions[swaps], self.secondPositions[swaps])
+            accepted = (delta >= 0) | (population.rng.random(len(chains)) < exp(minimum(delta, 0) / self.temperatures))
+            swaps = swaps[accepted]
+            population.swapCells(chains[accepted], self.blocks[swaps], self.firstCells[swaps], self.secondCells[swaps])
+            self.temperatures *= self.cooling
+            if self.keepBest():
+                break
+
+        population.track()
+
+class TabuSearch(Chains):
+    """ Tabu search: every chain scores all its swaps and takes the best one, even if it lowers the
+    fitness. A swap that was taken can't be taken again by the chain for "TABU_TENURE" steps, unless
+    it leads to a fitness that the chain has never reached (aspiration). """
+    def __init__(self, population, given):
+        super().__init__(population, given)
+        self.tenure = TABU_TENURE
+        self.swapLimit = LOCAL_SEARCH_SWAPS
+        self.reset()
+
+    def reset(self):
+        """ Clears the tabu list and the best fitness of every chain. """
+        self.step = 0
+        self.tabuUntil = zeros((len(self.population), len(self.blocks)), dtype=int) # step a swap is allowed again
+        self.resetBest()
+
+    def run(self, steps):
+        """ Moves every chain "steps" times, or until a chain reaches the fitness of a solution. A step scores
+        at most "swapLimit" random swaps on larger grids. """
+        population = self.population
+        if len(self.blocks) == 0 or self.isSolved():
+            return
+        swapNumber = min(len(self.blocks), self.swapLimit)
+        chainNumber = len(population)
+        chains = arange(chainNumber)
+        for _ in range(steps):
+            self.step += 1
+            swaps = arange(len(self.blocks)) if swapNumber == len(self.blocks) else \
+                population.rng.choice(len(self.blocks), swapNumber, replace=False)
+            delta, _ = population.swapDelta(chains.repeat(swapNumber),
+                tile(self.firstPositions[swaps], chainNumber), tile(self.secondPositions[swaps], chainNumber))
+            delta = delta.reshape(chainNumber, swapNumber)
+            aspiration = population.fitness.reshape(-1, 1) + delta > self.bestFitness.reshape(-1, 1)
+            allowed = (self.tabuUntil[:, swaps] < self.step) | aspiration
+            # Fitness changes are integers, the random fraction only breaks the ties
+            scores = where(allowed, delta + population.rng.random(delta.shape) * 0.5, -inf)
+            best = scores.argmax(axis=1)
+            moving = allowed[chains, best]
+            movingChains, best = chains[moving], swaps[best[moving]]
+            population.swapCells(movingChains, self.blocks[best], self.firstCells[best], self.secondCells[best])
+            self.tabuUntil[movingChains, best] = self.step + self.tenure
+            if self.keepBest():
+                break
+
+        population.track()
+
+def newEngine(option, population, given):
+    """
+    Returns the single-trajectory engine of a solver option working on the candidates of a population.
+
+    Parameters:
+        - option (int): SolverOption.ANNEALING or SolverOption.TABU
+        - population (Population): Evaluated candidates, each of them is a chain
+        - given (array): The given chromosome of the Sudoku problem
+    """
+    if option == SolverOption.ANNEALING:
+        return Annealing(population, given)
+    elif option == SolverOption.TABU:
+        return TabuSearch(population, given)
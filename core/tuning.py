@@ -0,0 +1,266 @@
+import json
+import sys
+from argparse import ArgumentParser
+from itertools import product
+from math import inf, prod
+from multiprocessing import Pool
+from os import cpu_count
+from time import perf_counter
+from numpy.random import default_rng
+
+from .batch import collectPuzzles
+from .context import OPERATORS, newContext
+from .given import Given
+from .sudoku import Sudoku
+from .settings import EventOption, SolverOption, FITNESS_CHOICE, MUTATION_CHOICE, SELECTION_CHOICE, CROSSOVER_CHOICE
+from .settings import POPULATION_SIZE, ELITE_NUMBER, MUTATION_RATE, CROSSOVER_RATE, MAX_STALE_COUNT
+
+"""
+Tuning of the operators and parameters of the genetic algorithm on a puzzle set. A configuration
+(see context.newContext) is scored by its expected time to solution: the time of all its runs, the
+failed ones included, divided by the number of solved runs. It is the mean time a solver restarted
+with new seeds until it succeeds would take, so a slow but reliable configuration can beat a fast
+one that often fails. Every configuration is run with the same puzzles and seeds.
+"""
+
+# Values tried for every parameter, the operators are written with the names of the options in settings
+SPACE = {
+    "populationSize": [250, 500, 1000, 2000],
+    "eliteNumber": [0, 10, 50],
+    "mutationRate": [0.4, 0.6, 0.8, 1.0],
+    "crossoverRate": [0.6, 0.8, 1.0],
+    "maxStaleCount": [20, 30, 50],
+    "fitness": ["DIFFERENT", "PERFECT"],
+    "mutation": ["RANDOM", "SWAP", "MULTI_SWAP", "ALL_SWAP", "RANDOM_RESET"],
+    "selection": ["RANKING", "TOURNAMENT", "TOP"],
+    "crossover": ["RANDOM", "ONE_POINT", "TWO_POINT", "ROW_COL", "UNIFORM", "CHOICE", "HALF"],
+}
+
+# Search methods of the command line
+METHODS = ["grid", "random", "halving"]
+
+def optionName(optionClass, value):
+    """
+    Returns the name of the value of an option class, e.g. "PERFECT" for FitnessOption.PERFECT.
+    """
+    for name in dir(optionClass):
+        if not name.startswith("_") and getattr(optionClass, name) == value:
+            return name
+
+def defaultConfig():
+    """
+    Returns the configuration of the settings.
+    """
+    choices = {"fitness": FITNESS_CHOICE, "mutation": MUTATION_CHOICE, "selection": SELECTION_CHOICE,
+        "crossover": CROSSOVER_CHOICE}
+    config = {
+        "populationSize": POPULATION_SIZE,
+        "eliteNumber": ELITE_NUMBER,
+        "mutationRate": MUTATION_RATE,
+        "crossoverRate": CROSSOVER_RATE,
+        "maxStaleCount": MAX_STALE_COUNT,
+    }
+    config.update({key: optionName(OPERATORS[key], choice) for key, choice in choices.items()})
+
+    return config
+
+def gridConfigs(space):
+    """
+    Returns every combination of the values of a space, the parameters it doesn't hold keep their settings.
+    """
+    names = list(space)
+    return [dict(defaultConfig(), **dict(zip(names, values))) for values in product(*space.values())]
+
+def randomConfigs(space, number, rng):
+    """
+    Returns "number" different configurations drawn at random from a space, the first one is the
+    configuration of the settings so the tuned profile is never worse than the settings on the puzzle set.
+
+    Parameters:
+        - space (dict): Values tried for every parameter, see SPACE
+        - number (int): Number of configurations, there are fewer if the space is smaller
+        - rng (Generator): Random number generator
+    """
+    configs = [defaultConfig()]
+    seen = {tuple(sorted(configs[0].items()))}
+    # The configuration of the settings may already be one of the combinations of the space
+    inSpace = all(configs[0][name] in values for name, values in space.items())
+    number = min(number, prod(len(values) for values in space.values()) + (not inSpace))
+    while len(configs) < number:
+        config = dict(defaultConfig(), **{name: values[rng.integers(len(values))] for name, values in space.items()})
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+
+    return configs
+
+def runTrial(job):
+    """
+    Solves a puzzle with a configuration and returns the result as a dictionary, the run fails when it
+    takes more than the time limit.
+
+    Parameters:
+        - job (tuple): Index of the configuration, configuration, puzzle name, values, seed and time limit
+    """
+    index, config, name, values, seed, timeLimit = job
+    start = perf_counter()
+    given = Given()
+    given.loadValues(values)
+    sudoku = Sudoku(verbose=False, seed=seed, solver=SolverOption.GENETIC, context=newContext(config, given))
+    for event in sudoku.iterate(snapshotInterval=0):
+        if event.elapsed > timeLimit:
+            break
+
+    return {
+        "index": index,
+        "puzzle": name,
+        "seed": seed,
+        "solved": event.option == EventOption.FOUND,
+        "time": perf_counter() - start,
+        "generations": sudoku.generationCount,
+    }
+
+def expectedTime(results):
+    """
+    Returns the expected time to solution of the runs of a configuration, infinity if none of them is solved.
+    """
+    solved = sum(result["solved"] for result in results)
+    return sum(result["time"] for result in results) / solved if solved else inf
+
+def evaluate(configs, indexes, puzzles, seeds, timeLimit, pool, results):
+    """
+    Runs some configurations on every puzzle with every seed.
+
+    Parameters:
+        - configs (list): Configurations being tuned
+        - indexes (list): Indexes of the configurations to run
+        - puzzles (list): (name, values) of the puzzles
+        - seeds (list): Seeds of the runs of every puzzle
+        - timeLimit (float): Seconds after which a run fails
+        - pool (Pool): Process pool running the trials, None to run them in this process
+        - results (list): Result list of every configuration, the new results are appended
+    """
+    jobs = [(index, configs[index], name, values, seed, timeLimit)
+        for index in indexes for name, values in puzzles for seed in seeds]
+    for result in (pool.imap_unordered(runTrial, jobs) if pool else map(runTrial, jobs)):
+        results[result["index"]].append(result)
+
+def rank(indexes, results):
+    """
+    Returns the indexes of configurations from the best to the worst, by expected time to solution and
+    then by number of solved runs.
+    """
+    return sorted(indexes, key=lambda index: (expectedTime(results[index]),
+        -sum(result["solved"] for result in results[index]), index))
+
+def tune(puzzles, method="halving", trials=16, runs=2, seed=0, workers=1, timeLimit=10.0, space=SPACE, eta=2):
+    """
+    Searches the configuration with the lowest expected time to solution on a puzzle set.
+
+    Parameters:
+        - puzzles (list): (name, values) of the puzzles
+        - method (str) (optional="halving"): "grid" runs every combination of the space, "random" runs
+            "trials" random configurations, "halving" (successive halving) runs "trials" random configurations
+            with few seeds, keeps the best 1 / eta of them and runs them again with eta times more seeds,
+            until a single one is left
+        - trials (int) (optional=16): Number of configurations of the random and halving methods
+        - runs (int) (optional=2): Number of seeds of every puzzle, of the first round for halving
+        - seed (int) (optional=0): Seed of the random configurations and of the first run, the next runs use
+            the following seeds
+        - workers (int) (optional=1): Number of processes running trials in parallel
+        - timeLimit (float) (optional=10.0): Seconds after which a run fails
+        - space (dict) (optional=SPACE): Values tried for every parameter
+        - eta (int) (optional=2): Reduction factor of the halving method
+
+    Return:
+        Profile dictionary with the best configuration in "config", it can be loaded by context.loadConfig
+    """
+    if method == "grid":
+        configs = gridConfigs(space)
+    else:
+        configs = randomConfigs(space, trials, default_rng(seed))
+    results = [[] for _ in configs]
+    indexes = list(range(len(configs)))
+    seeds = list(range(seed, seed + runs))
+    # Configurations dropped by successive halving, the last dropped first
+    dropped = []
+
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        evaluate(configs, indexes, puzzles, seeds, timeLimit, pool, results)
+        while method == "halving" and len(indexes) > 1:
+            ranking = rank(indexes, results)
+            indexes = ranking[:max(1, len(indexes) // eta)]
+            dropped = ranking[len(indexes):] + dropped
+            # The survivors are run with new seeds, their earlier runs still count
+            newSeeds = list(range(seeds[-1] + 1, seeds[-1] + 1 + len(seeds) * (eta - 1)))
+            print("Halving: %d configurations left, %d seeds" % (len(indexes), len(seeds) + len(newSeeds)),
+                file=sys.stderr)
+            evaluate(configs, indexes, puzzles, newSeeds, timeLimit, pool, results)
+            seeds += newSeeds
+    finally:
+        if pool:
+            pool.terminate()
+
+    def summary(index):
+        time = expectedTime(results[index])
+        return {
+            "config": configs[index],
+            "expectedTime": round(time, 4) if time < inf else None,
+            "runs": len(results[index]),
+            "solved": sum(result["solved"] for result in results[index]),
+        }
+
+    # A configuration that went through more rounds of halving ranks better
+    ranking = rank(indexes, results) + dropped
+    best = summary(ranking[0])
+
+    return {
+        "config": best["config"],
+        "expectedTime": best["expectedTime"],
+        "method": method,
+        "puzzles": [name for name, _ in puzzles],
+        "seed": seed,
+        "timeLimit": timeLimit,
+        "trials": [summary(index) for index in ranking],
+    }
+
+def main(argv):
+    parser = ArgumentParser(description="Tune the operators and parameters of the genetic algorithm on a puzzle "
+        "set and write the best configuration as a profile.")
+    parser.add_argument("sources", nargs="*", default=["puzzles"],
+        help="puzzle directories, puzzle files or glob patterns, the puzzles folder by default")
+    parser.add_argument("-m", "--method", choices=METHODS, default="halving",
+        help="grid search, random search or successive halving")
+    parser.add_argument("-n", "--trials", type=int, default=16,
+        help="number of configurations of the random search and successive halving")
+    parser.add_argument("-r", "--runs", type=int, default=2,
+        help="number of seeds each puzzle is solved with, in the first round of successive halving")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+        help="seed of the random configurations and of the first run")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+        help="number of runs in parallel, 0 uses every core")
+    parser.add_argument("-t", "--time-limit", type=float, default=10.0,
+        help="seconds after which a run fails")
+    parser.add_argument("-p", "--parameters", nargs="+", choices=SPACE, default=None,
+        help="parameters to tune, the others keep their settings, all of them by default")
+    parser.add_argument("-o", "--output", default="-",
+        help="profile file to write, stdout by default, it is loaded with --config by batch.py and benchmark.py")
+    args = parser.parse_args(argv)
+
+    puzzles = collectPuzzles(args.sources)
+    workers = args.workers if args.workers > 0 else cpu_count()
+    space = {name: SPACE[name] for name in args.parameters} if args.parameters else SPACE
+    start = perf_counter()
+    profile = tune(puzzles, args.method, args.trials, args.runs, args.seed, workers, args.time_limit, space)
+    text = json.dumps(profile, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    print("Tuned %d configurations in %.2fs, expected time to solution %s" % (len(profile["trials"]),
+        perf_counter() - start, profile["expectedTime"]), file=sys.stderr)
+
+    return 0
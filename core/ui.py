@@ -1,25 +1,30 @@
 from tkinter import Tk, Canvas, Frame, Button, Label, filedialog
 
-from .settings import ClearButtonOption, DIGIT_NUMBER, BLOCK_NUMBER, BOARD_SIZE, DIGIT_SIZE, LINE_COLOR
-from .settings import DIGIT_SPACE, DUPLICATE_DIGIT_BG, DUPLICATE_DIGIT_GIVEN_BG, FONT_FAMILY
+from math import isqrt
+
+from .settings import ClearButtonOption, DIGIT_NUMBER, BOARD_SIZE, DIGIT_SIZE, DIGIT_SYMBOLS, LINE_COLOR
+from .settings import DUPLICATE_DIGIT_BG, DUPLICATE_DIGIT_GIVEN_BG, FONT_FAMILY
 from .settings import OpenButtonOption, SOLUTION_DIGIT_BG, SOLUTION_DIGIT_GIVEN_BG
 from .settings import SolveButtonOption, TRANSPARENT_DIGIT_BG, WriteButtonOption
 from .settings import GIVEN_DIGIT_COLOR, NORMAL_DIGIT_COLOR, TEXT_SIZE
-from .given import given
 
 class Ui:
     """
     The UI of the sudoku app
     """
-    def __init__(self):
+    def __init__(self, given):
+        self.given = given # given grid of the app, its values and duplicate values are drawn
         # Initial window of app
         self.window = Tk()
         self.window.title("Sudoku") # app title
         self.window.resizable(0, 0) # make it cannot resize because size is fixed
         self.mainBody = None # main body of app, it store sudoku board
         self.board = None # sudoku board
+        self.digitNumber = DIGIT_NUMBER # size of the board, it follows the size of the loaded puzzle
         self.boardItems = [] # use to store items
         self.boardItemBgs = [] # use to store items background
+        # Text, color and background of each item, the items that don't change are not configured again
+        self.boardItemStates = {}
         # Button list
         self.openButton = None
         self.writeButton = None
@@ -78,65 +83,90 @@ class Ui:
 
         self.initializeBoard()
 
-    def initializeBoard(self):
+    def initializeBoard(self, digitNumber=DIGIT_NUMBER):
         """"
-        Intialize the board for sudoku
-        """
+        Intialize the board for sudoku of "digitNumber" digits
+        """
+        self.board.delete("all")
+        self.digitNumber = digitNumber
+        self.boardItems = []
+        self.boardItemBgs = []
+        self.boardItemStates = {}
+        blockNumber = isqrt(digitNumber)
+        cellSize = BOARD_SIZE/digitNumber
+        # The digits shrink with the cells
+        digitSize = int(DIGIT_SIZE*DIGIT_NUMBER/digitNumber)
+
         # Initialize digit for board
-        for row in range(DIGIT_NUMBER):
+        for row in range(digitNumber):
             rowTemp = []
             rowTemp2 = []
-            for col in range(DIGIT_NUMBER):
+            for col in range(digitNumber):
                 rowTemp2.append(self.board.create_rectangle(
-                        BOARD_SIZE*(col)/DIGIT_NUMBER,
-                        BOARD_SIZE*(row)/DIGIT_NUMBER,
-                        BOARD_SIZE*(col+1)/DIGIT_NUMBER,
-                        BOARD_SIZE*(row+1)/DIGIT_NUMBER,
+                        cellSize*(col),
+                        cellSize*(row),
+                        cellSize*(col+1),
+                        cellSize*(row+1),
                         fill=TRANSPARENT_DIGIT_BG
                     ))
                 rowTemp.append(self.board.create_text(
-                        BOARD_SIZE*(col)/DIGIT_NUMBER + DIGIT_SPACE,
-                        BOARD_SIZE*(row)/DIGIT_NUMBER + DIGIT_SPACE,
-                        font=(FONT_FAMILY, DIGIT_SIZE),
+                        cellSize*(col + 0.5),
+                        cellSize*(row + 0.5),
+                        font=(FONT_FAMILY, digitSize),
                         text=" ", fill=NORMAL_DIGIT_COLOR
                     ))
             self.boardItems.append(rowTemp)
             self.boardItemBgs.append(rowTemp2)
 
         # Create small line
-        for i in range(DIGIT_NUMBER - 1):
+        for i in range(digitNumber - 1):
             # Vertical lines
-            self.board.create_line((i+1)*BOARD_SIZE/DIGIT_NUMBER, 0,
-                    (i+1)*BOARD_SIZE/DIGIT_NUMBER, BOARD_SIZE, fill=LINE_COLOR)
+            self.board.create_line((i+1)*cellSize, 0,
+                    (i+1)*cellSize, BOARD_SIZE, fill=LINE_COLOR)
             # Horizontal lines
-            self.board.create_line(0, (i+1)*BOARD_SIZE/DIGIT_NUMBER, BOARD_SIZE,
-                    (i+1)*BOARD_SIZE/DIGIT_NUMBER, fill=LINE_COLOR)
+            self.board.create_line(0, (i+1)*cellSize, BOARD_SIZE,
+                    (i+1)*cellSize, fill=LINE_COLOR)
 
         # Create big seperate digit set line
-        for i in range(BLOCK_NUMBER - 1):
+        for i in range(blockNumber - 1):
             # Vertical lines
-            self.board.create_line((i+1)*BOARD_SIZE/BLOCK_NUMBER, 0,
-                    (i+1)*BOARD_SIZE/BLOCK_NUMBER, BOARD_SIZE, width=5, fill=LINE_COLOR)
+            self.board.create_line((i+1)*BOARD_SIZE/blockNumber, 0,
+                    (i+1)*BOARD_SIZE/blockNumber, BOARD_SIZE, width=5, fill=LINE_COLOR)
             # Horizontal lines
-            self.board.create_line(0, (i+1)*BOARD_SIZE/BLOCK_NUMBER, BOARD_SIZE,
-                    (i+1)*BOARD_SIZE/BLOCK_NUMBER, width=5, fill=LINE_COLOR)
+            self.board.create_line(0, (i+1)*BOARD_SIZE/blockNumber, BOARD_SIZE,
+                    (i+1)*BOARD_SIZE/blockNumber, width=5, fill=LINE_COLOR)
+
+    def resizeBoard(self, digitNumber):
+        """
+        Rebuild the board if the puzzle doesn't have the size of the current one
+        """
+        if digitNumber != self.digitNumber:
+            self.initializeBoard(digitNumber)
 
     def drawItem(self, row, col, value, color=NORMAL_DIGIT_COLOR):
         """
-        Draw specific item value to board
+        Draw specific item value to board, the digits above 9 are drawn as letters
         """
         # Make item be empty when value is zero else set it to value
-        if (value == 0):
-            self.board.itemconfig(self.boardItems[row][col],
-                    text="", fill=color)
+        if isinstance(value, str):
+            text = value
+        elif (value == 0):
+            text = ""
         else:
-            self.board.itemconfig(self.boardItems[row][col],
-                    text=str(value), fill=color)
+            text = DIGIT_SYMBOLS[value]
+        if self.boardItemStates.get((row, col, "text")) == (text, color):
+            return
+        self.boardItemStates[(row, col, "text")] = (text, color)
+        self.board.itemconfig(self.boardItems[row][col],
+                text=text, fill=color)
 
     def drawItemBg(self, row, col, color=DUPLICATE_DIGIT_BG):
         """
         Draw background of specific item to board
         """
+        if self.boardItemStates.get((row, col, "bg")) == color:
+            return
+        self.boardItemStates[(row, col, "bg")] = color
         self.board.itemconfig(self.boardItemBgs[row][col],
             fill=color)
 
@@ -144,30 +174,30 @@ class Ui:
         """
         Draw all given items to board
         """
-        for row in range(DIGIT_NUMBER):
-            for col in range(DIGIT_NUMBER):
-                if (given.values[row][col] != 0):
-                    self.drawItem(row, col, given.values[row][col], color)
+        for row in range(self.digitNumber):
+            for col in range(self.digitNumber):
+                if (self.given.values[row][col] != 0):
+                    self.drawItem(row, col, self.given.values[row][col], color)
 
     def drawRemainBoard(self, values, color=NORMAL_DIGIT_COLOR):
         """
         Draw all specific items values to board except given values
         """
-        for row in range(DIGIT_NUMBER):
-            for col in range(DIGIT_NUMBER):
-                if (given.values[row][col] == 0):
+        for row in range(self.digitNumber):
+            for col in range(self.digitNumber):
+                if (self.given.values[row][col] == 0):
                     self.drawItem(row, col, values[row][col], color)
 
     def drawDuplicateBg(self):
         """
         Draw background for all duplicated values else keep transparent
         """
-        for row in range(DIGIT_NUMBER):
-            for col in range(DIGIT_NUMBER):
+        for row in range(self.digitNumber):
+            for col in range(self.digitNumber):
                 color = DUPLICATE_DIGIT_BG
-                if (given.duplicateValues[row][col] == 0):
+                if (self.given.duplicateValues[row][col] == 0):
                     color = TRANSPARENT_DIGIT_BG
-                elif (given.values[row][col] != 0):
+                elif (self.given.values[row][col] != 0):
                     color = DUPLICATE_DIGIT_GIVEN_BG
                 self.drawItemBg(row, col, color)
 
@@ -175,12 +205,12 @@ class Ui:
         """
         Draw solution background to board
         """
-        for row in range(DIGIT_NUMBER):
-            for col in range(DIGIT_NUMBER):
+        for row in range(self.digitNumber):
+            for col in range(self.digitNumber):
                 color = SOLUTION_DIGIT_BG
-                if (given.duplicateValues[row][col] != 0):
+                if (self.given.duplicateValues[row][col] != 0):
                     color = TRANSPARENT_DIGIT_BG
-                elif (given.values[row][col] != 0):
+                elif (self.given.values[row][col] != 0):
                     color = SOLUTION_DIGIT_GIVEN_BG
                 self.drawItemBg(row, col, color)
 
@@ -303,6 +333,6 @@ class Ui:
         """
         Convert Posion of clicked position to sudoku puzzle board position
         """
-        row = int(y/(BOARD_SIZE/DIGIT_NUMBER))
-        col = int(x/(BOARD_SIZE/DIGIT_NUMBER))
+        row = int(y/(BOARD_SIZE/self.digitNumber))
+        col = int(x/(BOARD_SIZE/self.digitNumber))
         return row, col
\ No newline at end of file
@@ -0,0 +1,65 @@
+from numpy import array as npArray, take_along_axis, where, zeros
+
+from .fitness import countValues
+from .geometry import getGeometry
+
+def conflictMap(genes):
+    """
+    Returns the cells holding a value that appears more than once in their row, column or block.
+    Unknown cells (value 0) are never in conflict.
+
+    Parameters:
+        - genes (array): (P, DIGIT_NUMBER, DIGIT_NUMBER) stack of chromosomes, or a single chromosome
+
+    Return:
+        Boolean array of the shape of genes, True for the cells in conflict
+    """
+    genes = npArray(genes)
+    digitNumber = genes.shape[-1]
+    geometry = getGeometry(digitNumber)
+    stack = genes.reshape(-1, digitNumber, digitNumber)
+
+    # Count the values of every unit, then look up the count of the value of each unit cell
+    counts = countValues(stack, geometry.unitIndexes)
+    unitValues = stack.reshape(len(stack), -1)[:, geometry.unitIndexes]
+    duplicates = (take_along_axis(counts, unitValues, axis=2) > 1) & (unitValues != 0)
+
+    # Every cell is in one row, one column and one block, so each third of the units covers the grid once
+    conflicts = zeros((len(stack), geometry.cellNumber), dtype=bool)
+    for start in range(0, len(geometry.unitIndexes), digitNumber):
+        units = slice(start, start + digitNumber)
+        conflicts[:, geometry.unitIndexes[units].ravel()] |= duplicates[:, units].reshape(len(stack), -1)
+
+    return conflicts.reshape(genes.shape)
+
+def validateSolutions(solutions, puzzles=None):
+    """
+    Checks many solutions at once. A solution is valid if all its cells hold a digit, every
+    row, column and block holds every digit once and it keeps the given values of its puzzle.
+
+    Parameters:
+        - solutions (array): (N, DIGIT_NUMBER * DIGIT_NUMBER) solution grids written row by row,
+            or (N, DIGIT_NUMBER, DIGIT_NUMBER) grids
+        - puzzles (array) (optional=None): Puzzles of the solutions in the same layout, 0 for an unknown
+            cell. A single puzzle can be given for all solutions, givens are not checked if it's not given.
+
+    Return:
+        (N,) boolean array, True for the valid solutions
+    """
+    solutions = npArray(solutions)
+    number = len(solutions)
+    digitNumber = solutions.shape[-1] if solutions.ndim == 3 else int(round(solutions.shape[-1] ** 0.5))
+    geometry = getGeometry(digitNumber)
+    grids = solutions.reshape(number, geometry.cellNumber)
+
+    # Values out of range are counted as unknown cells, so they fail the counts below
+    inRange = (grids >= 1) & (grids <= digitNumber)
+    genes = where(inRange, grids, 0)[:, geometry.encodeIndexes].reshape(number, digitNumber, digitNumber)
+    counts = countValues(genes, geometry.unitIndexes)
+    valid = inRange.all(axis=1) & (counts[:, :, 1:] == 1).all(axis=(1, 2))
+
+    if puzzles is not None:
+        puzzles = npArray(puzzles).reshape(-1, geometry.cellNumber)
+        valid &= ((puzzles == 0) | (puzzles == grids)).all(axis=1)
+
+    return valid
@@ -0,0 +1,34 @@
+from glob import glob
+from os import path as osPath
+
+from core.batch import readPuzzles
+from core.context import Context
+from core.given import Given
+from core.helper import encodePuzzle
+from core.tracker import newTracker, valueMasks
+
+PUZZLE_FOLDER = osPath.join(osPath.dirname(osPath.dirname(osPath.abspath(__file__))), "puzzles")
+
+def puzzlePaths(folder=PUZZLE_FOLDER):
+    """ Returns the paths of the puzzle files of a folder. """
+    return sorted(glob(osPath.join(folder, "*.txt")))
+
+def loadPuzzle(name):
+    """ Returns the values of a puzzle of the puzzles folder. """
+    return readPuzzles(osPath.join(PUZZLE_FOLDER, name))[0][1]
+
+def givenTracker(values):
+    """ Returns the tracker of a puzzle before any propagation, only the given cells are fixed. """
+    chromosome = encodePuzzle(values)
+    tracker = newTracker(len(values))
+    cells = tracker.reshape(-1)
+    givenCells = chromosome.reshape(-1)
+    fixed = givenCells != 0
+    cells[fixed] = valueMasks(givenCells[fixed], len(values))
+    return tracker
+
+def newSudokuContext(values, **options):
+    """ Returns a context whose given grid holds a puzzle. """
+    given = Given()
+    given.loadValues(values)
+    return Context(given, **options)
@@ -0,0 +1,71 @@
+import unittest
+from numpy import arange
+
+from core.population import Population
+from core.sudoku import Sudoku
+from core.mutation import freePairs
+from core.settings import FitnessOption, MutationOption
+from tests.common import loadPuzzle, newSudokuContext
+
+class IncrementalFitnessTest(unittest.TestCase):
+    """ The fitness updated by the swaps must be the one of a full evaluation. """
+
+    def newPopulation(self, fitnessOption, number=50, seed=0, **options):
+        sudoku = Sudoku(verbose=False, seed=seed,
+            context=newSudokuContext(loadPuzzle("puzzle_very_hard_2.txt"), fitnessOption=fitnessOption, **options))
+        self.assertTrue(sudoku.fillPredetermined())
+        sudoku.population.initializeCandidates(number, sudoku.encodedGiven, sudoku.trackGrid)
+        return sudoku
+
+    def assertEvaluated(self, sudoku):
+        population = sudoku.population
+        fitness, fitnessMatrices = population.fitness.copy(), population.fitnessMatrices.copy()
+        rowCounts, columnCounts = population.rowCounts.copy(), population.columnCounts.copy()
+        population.evaluate(sudoku.trackGrid)
+        self.assertTrue((fitness == population.fitness).all())
+        self.assertTrue((fitnessMatrices == population.fitnessMatrices).all())
+        self.assertTrue((rowCounts == population.rowCounts).all())
+        self.assertTrue((columnCounts == population.columnCounts).all())
+
+    def testSwapDelta(self):
+        for option in (FitnessOption.DIFFERENT, FitnessOption.PERFECT):
+            sudoku = self.newPopulation(option)
+            population = sudoku.population
+            blocks, firstCells, secondCells = freePairs(sudoku.encodedGiven)
+            digitNumber = len(sudoku.encodedGiven)
+            swaps = population.rng.integers(0, len(blocks), len(population))
+            indexes = arange(len(population))
+            delta, _ = population.swapDelta(indexes, blocks[swaps] * digitNumber + firstCells[swaps],
+                blocks[swaps] * digitNumber + secondCells[swaps])
+
+            # The same swaps applied to copies of the genes and evaluated from scratch
+            genes = population.genes.copy()
+            first, second = genes[indexes, blocks[swaps], firstCells[swaps]], genes[indexes, blocks[swaps], secondCells[swaps]]
+            genes[indexes, blocks[swaps], firstCells[swaps]] = second
+            genes[indexes, blocks[swaps], secondCells[swaps]] = first
+            swapped = Population(context=population.context)
+            swapped.loadGenes(genes, sudoku.trackGrid)
+            self.assertTrue((population.fitness + delta == swapped.fitness).all())
+
+    def testSwapCells(self):
+        mutationOptions = [name for name in dir(MutationOption) if not name.startswith("_")]
+        for fitnessOption in (FitnessOption.DIFFERENT, FitnessOption.PERFECT):
+            for name in mutationOptions:
+                with self.subTest(fitness=fitnessOption, mutation=name):
+                    sudoku = self.newPopulation(fitnessOption, mutationOption=getattr(MutationOption, name))
+                    population = sudoku.population
+                    # Several rounds of the mutation operator, a candidate is swapped many times
+                    for _ in range(5):
+                        population.mutate(arange(len(population)), sudoku.encodedGiven)
+                    self.assertEvaluated(sudoku)
+
+    def testLocalSearch(self):
+        sudoku = self.newPopulation(FitnessOption.PERFECT, number=100)
+        before = sudoku.population.fitness.copy()
+        sudoku.population.localSearchFraction = 0.5
+        sudoku.population.localSearch(sudoku.encodedGiven)
+        self.assertTrue((sudoku.population.fitness >= before).all())
+        self.assertEvaluated(sudoku)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from os import path as osPath
+
+from core.batch import readPuzzles
+from core.exact import countSolutions, solveExact
+from core.helper import decodePuzzle
+from core.propagation import RULES, propagate
+from core.tracker import valueMasks
+from core.validation import validateSolutions
+from tests.common import PUZZLE_FOLDER, givenTracker, puzzlePaths
+
+class PropagationTest(unittest.TestCase):
+    """ The propagation rules only remove values that can't be part of the solution. """
+
+    def puzzles(self):
+        paths = puzzlePaths() + [osPath.join(PUZZLE_FOLDER, "large", "puzzle_16x16.txt")]
+        return [puzzle for path in paths for puzzle in readPuzzles(path)]
+
+    def testSolutionIsKept(self):
+        for name, values in self.puzzles():
+            with self.subTest(puzzle=name):
+                # The exact search alone fixes the values of the solution from the givens
+                solution = solveExact(givenTracker(values))
+                self.assertIsNotNone(solution)
+                self.assertTrue(validateSolutions(decodePuzzle(solution)[None], values)[0])
+
+                tracker = givenTracker(values)
+                solvable, _ = propagate(tracker, RULES)
+                self.assertTrue(solvable)
+                solutionMasks = valueMasks(solution.reshape(-1), len(values))
+                self.assertTrue((tracker.reshape(-1) & solutionMasks != 0).all())
+
+    def testEveryRuleAlone(self):
+        values = readPuzzles(osPath.join(PUZZLE_FOLDER, "puzzle_11_star.txt"))[0][1]
+        solution = solveExact(givenTracker(values))
+        solutionMasks = valueMasks(solution.reshape(-1), len(values))
+        for name, rule in RULES:
+            with self.subTest(rule=name):
+                tracker = givenTracker(values)
+                propagate(tracker, [RULES[0], (name, rule)])
+                self.assertTrue((tracker.reshape(-1) & solutionMasks != 0).all())
+
+    def testUnsolvable(self):
+        values = readPuzzles(osPath.join(PUZZLE_FOLDER, "puzzle_easy.txt"))[0][1].copy()
+        # Two equal givens in the first row
+        column = int((values[0] == 0).nonzero()[0][0])
+        values[0, column] = values[0][values[0] != 0][0]
+        solvable, _ = propagate(givenTracker(values), RULES)
+        self.assertFalse(solvable)
+        self.assertIsNone(solveExact(givenTracker(values)))
+
+class CountSolutionsTest(unittest.TestCase):
+
+    def testUniquePuzzles(self):
+        for path in puzzlePaths() + puzzlePaths(osPath.join(PUZZLE_FOLDER, "large")):
+            for name, values in readPuzzles(path):
+                with self.subTest(puzzle=name):
+                    # Propagation keeps every solution, it only shortens the search on the large grids
+                    tracker = givenTracker(values)
+                    propagate(tracker, RULES)
+                    self.assertEqual(countSolutions(tracker, 2), 1)
+
+    def testSeveralSolutions(self):
+        values = readPuzzles(osPath.join(PUZZLE_FOLDER, "puzzle_easy.txt"))[0][1].copy()
+        solution = decodePuzzle(solveExact(givenTracker(values)))
+        # An empty grid has many solutions, a solved grid only one
+        self.assertEqual(countSolutions(givenTracker(values * 0), 2), 2)
+        self.assertEqual(countSolutions(givenTracker(solution)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
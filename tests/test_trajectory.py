@@ -0,0 +1,63 @@
+import unittest
+from numpy import tile
+
+from core.exact import solveExact
+from core.fitness import maxFitness
+from core.mutation import freePairs
+from core.population import Population
+from core.sudoku import Sudoku
+from core.settings import SolverOption
+from core.trajectory import Annealing, TabuSearch
+from tests.common import givenTracker, loadPuzzle, newSudokuContext
+
+class ChainsTest(unittest.TestCase):
+    """ A chain that reaches a solution must not leave it. """
+
+    def setUp(self):
+        values = loadPuzzle("puzzle_very_hard.txt")
+        self.sudoku = Sudoku(verbose=False, seed=11, staleSolver=SolverOption.TABU, context=newSudokuContext(values))
+        self.assertTrue(self.sudoku.fillPredetermined())
+        self.solution = solveExact(givenTracker(values))
+        self.goal = maxFitness(len(values))
+
+    def nearSolutions(self, number):
+        """ Copies of the solution, each one with a different swap of two unknown cells. """
+        blocks, firstCells, secondCells = freePairs(self.sudoku.encodedGiven)
+        genes = tile(self.solution, (number, 1, 1))
+        for k in range(number):
+            block, first, second = blocks[k], firstCells[k], secondCells[k]
+            genes[k, block, first], genes[k, block, second] = genes[k, block, second], genes[k, block, first]
+        return genes
+
+    def newChains(self, genes):
+        chains = Population(self.sudoku.rng, context=self.sudoku.context)
+        chains.loadGenes(genes, self.sudoku.trackGrid)
+        return chains
+
+    def testEnginesStopAtSolution(self):
+        for engineClass in (TabuSearch, Annealing):
+            with self.subTest(engine=engineClass.__name__):
+                chains = self.newChains(self.nearSolutions(8))
+                self.assertLess(chains.bestFitness, self.goal)
+                engine = engineClass(chains, self.sudoku.encodedGiven)
+                engine.run(3000)
+                self.assertEqual(chains.bestFitness, self.goal)
+                self.assertTrue((chains.genes[chains.bestIndex] == self.solution).all())
+                self.assertEqual(int(engine.bestFitness.max()), self.goal)
+
+    def testSolvedChainsDontMove(self):
+        for engineClass in (TabuSearch, Annealing):
+            with self.subTest(engine=engineClass.__name__):
+                chains = self.newChains(tile(self.solution, (4, 1, 1)))
+                engineClass(chains, self.sudoku.encodedGiven).run(100)
+                self.assertTrue((chains.genes == self.solution).all())
+
+    def testRefineKeepsBestState(self):
+        genes = self.nearSolutions(8)
+        before = self.newChains(genes).fitness
+        refined = self.sudoku.refine(genes)
+        self.assertTrue((refined.fitness >= before).all())
+        self.assertEqual(refined.bestFitness, self.goal)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stderr
+from os import path as osPath
+from tempfile import TemporaryDirectory
+
+from core import batch, tuning
+from core.context import loadConfig, newContext
+from tests.common import PUZZLE_FOLDER
+
+class ProfileTest(unittest.TestCase):
+    """ A profile written by the tuner is loaded back by the solvers. """
+
+    def testRoundTrip(self):
+        puzzle = osPath.join(PUZZLE_FOLDER, "puzzle_easy.txt")
+        with TemporaryDirectory() as folder, redirect_stderr(io.StringIO()):
+            profilePath = osPath.join(folder, "profile.json")
+            self.assertEqual(tuning.main([puzzle, "--method", "random", "--trials", "3", "--runs", "1",
+                "--time-limit", "5", "--output", profilePath]), 0)
+            with open(profilePath, "r") as f:
+                profile = json.load(f)
+            config = loadConfig(profilePath)
+            self.assertEqual(config, profile["config"])
+            self.assertEqual(len(profile["trials"]), 3)
+
+            resultPath = osPath.join(folder, "results.jsonl")
+            self.assertEqual(batch.main([puzzle, "-c", profilePath, "--seed", "1", "-o", resultPath]), 0)
+            with open(resultPath, "r") as f:
+                self.assertTrue(json.loads(f.readline())["solved"])
+
+    def testConfigFile(self):
+        with TemporaryDirectory() as folder:
+            path = osPath.join(folder, "config.json")
+            with open(path, "w") as f:
+                json.dump({"populationSize": 300, "mutation": "SWAP"}, f)
+            context = newContext(loadConfig(path))
+            self.assertEqual(context.populationSize, 300)
+            self.assertEqual(context.mutation.batchCall, context.mutation.batchSwapMutate)
+
+            with open(path, "w") as f:
+                json.dump({"mutation": "UNKNOWN"}, f)
+            with self.assertRaises(ValueError):
+                loadConfig(path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,5 @@
+import sys
+from core.tuning import main
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))